@@ -32,6 +32,7 @@
 #include "open_spiel/abseil-cpp/absl/types/span.h"
 
 #include "open_spiel/games/mali_ba/mali_ba_common.h"
+#include "open_spiel/games/mali_ba/json_fwd.hpp"
 //#include "open_spiel/games/mali_ba/mali_ba_game.h"
 
 namespace open_spiel
@@ -93,6 +94,9 @@ namespace mali_ba
         void ObservationTensor(Player player, absl::Span<float> values) const override;
         void UndoAction(Player player, Action action) override;
         std::string Serialize() const override;
+        // Builds the JSON object behind Serialize(); the Python bindings convert it
+        // straight to a dict so the GUI can skip the dump/json.loads round trip.
+        nlohmann::json ToJson() const;
         bool IsChanceNode() const override;
         std::vector<std::pair<Action, double>> ChanceOutcomes() const override;
         std::unique_ptr<State> Clone() const override;
@@ -101,6 +105,10 @@ namespace mali_ba
         void UndoLastAction();
         void UndoToTurnStart();
         std::string PlayRandomMoveAndSerialize();
+        void PlayRandomMove();
+        // Plays up to max_moves random moves (stopping early at a terminal state)
+        // and returns whether the state is now terminal.
+        bool PlayRandomMoves(int max_moves);
         std::vector<Action> SelectRandomTurnActions();
         std::string PlayRandomTurnAndSerialize();
         Action SelectTrainingAwareRandomAction();
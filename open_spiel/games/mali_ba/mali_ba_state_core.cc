@@ -1527,6 +1527,18 @@ namespace open_spiel
                 return Serialize();
             }
 
+            PlayRandomMove();
+            return Serialize();
+        }
+
+        bool Mali_BaState::PlayRandomMoves(int max_moves) {
+            for (int i = 0; i < max_moves && !IsTerminal(); ++i) {
+                PlayRandomMove();
+            }
+            return IsTerminal();
+        }
+
+        void Mali_BaState::PlayRandomMove() {
             Action chosen_action = kInvalidAction;
 
             if (IsChanceNode()) {
@@ -1561,7 +1573,7 @@ namespace open_spiel
                     LOG_WARN("Action selection returned kInvalidAction, falling back to uniform random.");
                     std::vector<Action> legal_actions = LegalActions();
                     if (legal_actions.empty()) {
-                        SpielFatalError("PlayRandomMoveAndSerialize: Fallback failed, no legal actions.");
+                        SpielFatalError("PlayRandomMove: Fallback failed, no legal actions.");
                     }
                     std::uniform_int_distribution<int> dist(0, legal_actions.size() - 1);
                     chosen_action = legal_actions[dist(rng_)];
@@ -1569,7 +1581,6 @@ namespace open_spiel
             }
 
             ApplyAction(chosen_action);
-            return Serialize();
         }
 
     } // namespace mali_ba
@@ -71,6 +71,11 @@ absl::optional<HexCoord> JsonStringToHexCoord(const std::string& s) {
 }
 
 std::string Mali_BaState::Serialize() const {
+    // Convert the JSON object to a string (compact version)
+    return ToJson().dump();
+}
+
+json Mali_BaState::ToJson() const {
     /*
     Converts the entire current game state into a JSON string that can be stored, transmitted, or recreated later.
     Serialize() takes all the important game state data and packages it into a self-contained string representation.
@@ -229,12 +234,11 @@ std::string Mali_BaState::Serialize() const {
         
         j["midTurnState"] = j_mid_turn;
 
-        // Convert the JSON object to a string (compact version)
-        return j.dump();
+        return j;
 
     } catch (const json::exception& e) {
         SpielFatalError(absl::StrCat("JSON serialization error: ", e.what()));
-        return ""; // Should be unreachable
+        return json(); // Should be unreachable
     }
 }
 
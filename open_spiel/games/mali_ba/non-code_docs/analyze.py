@@ -1,10 +1,6 @@
 import re
 from collections import defaultdict
-import subprocess
-import os
 import csv
-import shutil
-from datetime import datetime
 from tkinter import Tk, filedialog
 
 # 📂 File picker dialog
@@ -15,59 +11,56 @@ if not log_file:
     print("No file selected.")
     exit(1)
 
-# 🧹 Backup existing output
-out_path = "/tmp/analz.txt"
-if os.path.exists(out_path):
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_path = f"/tmp/analz.bak.{timestamp}.txt"
-    shutil.move(out_path, backup_path)
-    print(f"Backed up old file to {backup_path}")
-
-# 🧵 Run grep pipeline via shell
-cmd = f'grep -E "DoApplyAction|Initializing game" "{log_file}" | grep -v "completed" > {out_path}'
-subprocess.run(cmd, shell=True, check=True)
-
-print(f"Filtered output saved to {out_path}")
-# Optional: proceed to parse with your existing Python logic
-
+# The timestamp is optional so one search feeds both the counts (every move)
+# and the CSV rows (timestamped moves only).
+move_pattern = re.compile(rb'(?:(\d{2}:\d{2}:\d{2}).*)?DoApplyAction: Player (\w+) applying move type (\d+) from action (\d+)')
+output_csv = "/tmp/analz_output.csv"
+READ_BUFFER_SIZE = 1 << 20  # 1 MiB reads; logs run to hundreds of MB
+WRITE_BUFFER_SIZE = 1 << 20
 
-pattern = re.compile(r'DoApplyAction: Player (\w+) applying move type (\d+) from action (\d+)')
 counts = defaultdict(lambda: defaultdict(int))
+game_id = 0
+rows = []
+
+# One pass over the raw log drives both the counts and the CSV rows. The
+# substring tests stand in for the old `grep -E ... | grep -v completed`
+# pipeline and keep the regex engine off lines that can't match. Bound
+# methods are hoisted to locals to skip the attribute lookup per line.
+# The log is read as bytes; only the captured groups are ever decoded.
+move_search = move_pattern.search
+rows_append = rows.append
+counts_getitem = counts.__getitem__
 
-with open(out_path) as f:
+with open(log_file, 'rb', buffering=READ_BUFFER_SIZE) as f:
     for line in f:
-        match = pattern.search(line)
-        if match:
-            player, move_type, action = match.groups()
-            counts[player][move_type] += 1
+        if b"completed" in line:
+            continue
+        if b"Initializing game" in line:
+            game_id += 1
+            continue
+        if b"DoApplyAction" not in line or b"applying move type" not in line:
+            continue
+        match = move_search(line)
+        if not match:
+            continue
+        # Index the match directly rather than unpacking a fresh groups() tuple
+        player = match[2]
+        move_type = match[3]
+        counts_getitem(player)[move_type] += 1
+        timestamp = match[1]
+        if timestamp is not None:
+            rows_append([game_id, timestamp.decode('ascii'), player.decode('ascii'),
+                         move_type.decode('ascii'), match[4].decode('ascii')])
 
 # Pretty print results
 for player, moves in counts.items():
-    print(f"Player: {player}")
+    print(f"Player: {player.decode('ascii')}")
     for move, count in sorted(moves.items()):
-        print(f"  Move type {move}: {count}")
-
-# === send the output to a CSV file
-log_file = out_path
-output_csv = "/tmp/analz_output.csv"
-
-init_pattern = re.compile(r'Initializing game')
-move_pattern = re.compile(r'(\d{2}:\d{2}:\d{2}).*Player (\w+) applying move type (\d+) from action (\d+)')
-
-game_id = 0
-rows = []
-
-with open(log_file) as f:
-    for line in f:
-        if init_pattern.search(line):
-            game_id += 1
-        match = move_pattern.search(line)
-        if match:
-            timestamp, player, move_type, action_id = match.groups()
-            rows.append([game_id, timestamp, player, move_type, action_id])
+        print(f"  Move type {move.decode('ascii')}: {count}")
 
 # 💾 Save to CSV
-with open(output_csv, 'w', newline='') as csvfile:
+# Large buffer and a single writerows(); the file is flushed once on close.
+with open(output_csv, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as csvfile:
     writer = csv.writer(csvfile)
     writer.writerow(['game_id', 'timestamp', 'player', 'move_type', 'action_id'])
     writer.writerows(rows)
@@ -4,10 +4,29 @@ from dataclasses import dataclass
 import os
 import json
 import collections
+import functools
 import random
-from typing import List, Dict, Tuple, NamedTuple, Optional, Set
+import re
+from typing import List, Dict, Tuple, NamedTuple, Optional, Set, Union
 from mali_ba.config import PlayerColor, TradePostType
 
+# orjson decodes the replay [setup] JSON several times faster than the
+# stdlib, so use it when it is installed.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Replay logs carry a full state JSON per move, so read them in large chunks
+REPLAY_READ_BUFFER_SIZE = 1 << 20
+# Classifies a replay log line in one match: a [section] header, or a move's
+# action=/state= line. Anything else is setup JSON or blank.
+_REPLAY_LINE_RE = re.compile(r'\s*\[(?P<header>[^\]]+)\]\s*$|action=(?P<action>.*)|state=(?P<state>.*)')
+
+# Kept as a NamedTuple on purpose: it is slot-less (__slots__ = ()) and hashes
+# with the C tuple hash, which beats a frozen dataclass or a Python-level
+# packed-int __hash__ for the set/dict lookups that dominate its use.
 class HexCoord(NamedTuple):
     x: int # Corresponds to 'x' in cube systems
     y: int # Corresponds to 'y' in cube systems
@@ -19,21 +38,32 @@ class HexCoord(NamedTuple):
     @classmethod
     def from_string(cls, coord_str):
         if not coord_str: return None
-        parts = coord_str.strip("()").split(',')
-        if len(parts) != 3:
-            return None
-        try:
-            x, y, z = int(parts[0]), int(parts[1]), int(parts[2])
-            if x + y + z != 0:
-                 # print(f"Warning: Invalid cube coordinates (sum!=0): {coord_str}")
-                 return None
-            return cls(x, y, z)
-        except ValueError:
-            return None
+        return _parse_hex(coord_str)
 
     def distance(self, other: 'HexCoord') -> int:
         return (abs(self.x - other.x) + abs(self.y - other.y) + abs(self.z - other.z)) // 2
 
+# The same few hundred coordinate strings recur in every replay/state update,
+# so parsed HexCoords are memoized (they are immutable and safe to share).
+@functools.lru_cache(maxsize=16384)
+def _parse_hex(coord_str: str) -> Optional[HexCoord]:
+    try:
+        a, b, c = coord_str.strip("()").split(',', 2)
+        x, y, z = int(a), int(b), int(c)
+    except ValueError:
+        return None
+    if x + y + z != 0:
+        # print(f"Warning: Invalid cube coordinates (sum!=0): {coord_str}")
+        return None
+    return HexCoord(x, y, z)
+
+def _require_hex(coord_str: str) -> HexCoord:
+    """_parse_hex for setup data, where a malformed coordinate is an error."""
+    hex_coord = _parse_hex(coord_str)
+    if hex_coord is None:
+        raise ValueError(f"Invalid hex coordinate in setup data: {coord_str!r}")
+    return hex_coord
+
 class TradePost:
     def __init__(self, owner: PlayerColor, type_: TradePostType):
         self.owner = owner
@@ -66,62 +96,50 @@ class TradeRoute:
         self.id = id_
         self.owner = owner  # Player who owns this route
         self.hexes = hexes  # List of hexes in the route
+        self._hex_set: Set[HexCoord] = set(hexes)  # Mirrors self.hexes for O(1) membership
         self.goods = goods or {}  # Resources gained from this route
         self.active = True  # Whether the route is currently valid/active
+
+    def has_hex(self, hex_coord: HexCoord) -> bool:
+        """Check whether the route passes through a hex"""
+        return hex_coord in self._hex_set
     
     def add_hex(self, hex_coord: HexCoord) -> bool:
         """Add a hex to the route if it's not already there"""
-        if hex_coord not in self.hexes:
+        if hex_coord not in self._hex_set:
             self.hexes.append(hex_coord)
+            self._hex_set.add(hex_coord)
             return True
         return False
     
     def remove_hex(self, hex_coord: HexCoord) -> bool:
         """Remove a hex from the route if it exists"""
-        if hex_coord in self.hexes:
+        if hex_coord in self._hex_set:
             self.hexes.remove(hex_coord)
+            self._hex_set.discard(hex_coord)
             return True
         return False
     
-    def is_valid(self, player_posts: Dict[HexCoord, List[TradePost]]) -> bool:
+    def is_valid(self, owner_posts: Dict[PlayerColor, Set[HexCoord]]) -> bool:
         """Check if this route is valid (has player's posts/centers at all locations)"""
         if len(self.hexes) < 2:
             return False
-            
-        for hex_coord in self.hexes:
-            # Check if player has a post at this hex
-            posts = player_posts.get(hex_coord, [])
-            player_has_post = any(post.owner == self.owner for post in posts)
-            if not player_has_post:
-                return False
-                
-        return True
+        # owner_posts maps each player to the hexes where they have a post/center
+        return self._hex_set.issubset(owner_posts.get(self.owner, ()))
     
-    def calculate_value(self, cities: List[City]) -> Dict[str, int]:
+    def calculate_value(self, cities_by_hex: Dict[HexCoord, City]) -> Dict[str, int]:
         """Calculate the value of this trade route based on connected cities"""
         # Find cities connected by this route
-        connected_cities = []
-        for city in cities:
-            if city.location in self.hexes:
-                connected_cities.append(city)
+        connected_cities = [cities_by_hex[h] for h in self.hexes if h in cities_by_hex]
         
         # Calculate value based on city connections
         goods = {}
-        if len(connected_cities) >= 2:
-            # Example rule: Each pair of connected cities grants 1 common good of each city
-            for i in range(len(connected_cities)):
-                for j in range(i+1, len(connected_cities)):
-                    city_i = connected_cities[i]
-                    city_j = connected_cities[j]
-                    
-                    # Add common goods from each city
-                    if city_i.common_good not in goods:
-                        goods[city_i.common_good] = 0
-                    goods[city_i.common_good] += 1
-                    
-                    if city_j.common_good not in goods:
-                        goods[city_j.common_good] = 0
-                    goods[city_j.common_good] += 1
+        num_connected = len(connected_cities)
+        if num_connected >= 2:
+            # Example rule: Each pair of connected cities grants 1 common good of each city,
+            # i.e. every city's common good is counted once per partner city.
+            for city in connected_cities:
+                goods[city.common_good] = goods.get(city.common_good, 0) + (num_connected - 1)
         
         self.goods = goods
         return goods
@@ -132,7 +150,9 @@ class SimpleReplayManager:
     
     def __init__(self):
         self.setup_data: Optional[Dict] = None
-        self.moves: List[Tuple[str, Dict]] = []  # List of (action, state) tuples
+        # List of (action, state JSON) tuples. States are kept as the raw logged
+        # strings and only decoded when the visualizer shows that move.
+        self.moves: List[Tuple[str, str]] = []
         self.current_move_index: int = -1  # -1 means showing the initial state before any moves
 
     def load_replay_file(self, filepath: Optional[str]) -> bool:
@@ -142,68 +162,52 @@ class SimpleReplayManager:
             return False
         
         try:
-            with open(filepath, 'r') as f:
-                lines = f.readlines()
-            
             self.setup_data = None
             self.moves = []
-            current_section_content = ""
             current_section_type = None # 'setup' or 'move'
+            # The setup JSON may span several lines, so its lines are joined once
+            # at the end of the section. Move sections hold one action= and one
+            # state= line each, which are captured as they stream past.
+            setup_lines: List[str] = []
+            current_action = ""
+            current_state = ""
 
-            for line in lines:
-                stripped_line = line.strip()
-                if not stripped_line:
-                    continue
-
-                if stripped_line.startswith('[') and stripped_line.endswith(']'):
-                    # --- End of the previous section ---
-                    if current_section_type and current_section_content:
+            match_line = _REPLAY_LINE_RE.match
+            with open(filepath, 'r', buffering=REPLAY_READ_BUFFER_SIZE) as f:
+                for line in f:
+                    m = match_line(line)
+                    if m is None:
                         if current_section_type == 'setup':
-                            self.setup_data = json.loads(current_section_content)
-                        elif current_section_type == 'move':
-                            # Move sections have action=... on a separate line
-                            action_line = ""
-                            state_json_str = ""
-                            move_lines = current_section_content.strip().split('\n')
-                            for move_line in move_lines:
-                                if move_line.startswith("action="):
-                                    action_line = move_line.split('=', 1)[1]
-                                elif move_line.startswith("state="):
-                                    state_json_str = move_line.split('=', 1)[1]
-                            
-                            if action_line and state_json_str:
-                                self.moves.append((action_line, json.loads(state_json_str)))
-
-                    # --- Start of a new section ---
-                    section_name = stripped_line[1:-1]
-                    if section_name == 'setup':
-                        current_section_type = 'setup'
-                    elif section_name.startswith('move'):
-                        current_section_type = 'move'
-                    else:
-                        current_section_type = None
-                    current_section_content = ""
-                
-                elif current_section_type:
-                    # Append line to the current section's content
-                    current_section_content += line
+                            setup_lines.append(line)
+                        continue
+
+                    kind = m.lastgroup
+                    if kind == 'header':
+                        # --- End of the previous section ---
+                        self._finish_replay_section(current_section_type, setup_lines,
+                                                    current_action, current_state)
+
+                        # --- Start of a new section ---
+                        section_name = m.group('header')
+                        if section_name == 'setup':
+                            current_section_type = 'setup'
+                        elif section_name.startswith('move'):
+                            current_section_type = 'move'
+                        else:
+                            current_section_type = None
+                        setup_lines = []
+                        current_action = ""
+                        current_state = ""
+
+                    elif current_section_type == 'move':
+                        if kind == 'action':
+                            current_action = m.group('action').rstrip()
+                        else:
+                            current_state = m.group('state')
 
             # --- Process the very last section in the file ---
-            if current_section_type and current_section_content:
-                if current_section_type == 'setup':
-                    self.setup_data = json.loads(current_section_content)
-                elif current_section_type == 'move':
-                    action_line = ""
-                    state_json_str = ""
-                    move_lines = current_section_content.strip().split('\n')
-                    for move_line in move_lines:
-                        if move_line.startswith("action="):
-                            action_line = move_line.split('=', 1)[1]
-                        elif move_line.startswith("state="):
-                            state_json_str = move_line.split('=', 1)[1]
-                    
-                    if action_line and state_json_str:
-                        self.moves.append((action_line, json.loads(state_json_str)))
+            self._finish_replay_section(current_section_type, setup_lines,
+                                        current_action, current_state)
 
             self.current_move_index = 0
             print(f"✅ Loaded replay: {len(self.moves)} moves from {filepath}")
@@ -217,6 +221,16 @@ class SimpleReplayManager:
             traceback.print_exc()
             return False
 
+    def _finish_replay_section(self, section_type: Optional[str], setup_lines: List[str],
+                               action: str, state_json_str: str) -> None:
+        """Store the data collected for a finished [setup] or [moveN] section."""
+        if section_type == 'setup':
+            if setup_lines:
+                self.setup_data = _json_loads(''.join(setup_lines))
+        elif section_type == 'move':
+            if action and state_json_str:
+                self.moves.append((action, state_json_str))
+
     def get_num_players(self) -> Optional[int]:
         if self.setup_data:
             return self.setup_data.get("num_players")
@@ -229,25 +243,32 @@ class SimpleReplayManager:
         if not self.setup_data or "cities" not in self.setup_data: return []
         cities = []
         for city_data in self.setup_data["cities"]:
-            loc_parts = city_data["location"].split(',')
-            location = HexCoord(int(loc_parts[0]), int(loc_parts[1]), int(loc_parts[2]))
+            location = _require_hex(city_data["location"])
             cities.append(City(city_data["id"], city_data["name"], city_data["cultural_group"], location, city_data["common_good"], city_data["rare_good"]))
         return cities
 
     def get_valid_hexes(self) -> Set[HexCoord]:
         if not self.setup_data or "valid_hexes" not in self.setup_data: return set()
-        hexes = set()
-        for hex_str in self.setup_data["valid_hexes"]:
-            loc_parts = hex_str.split(',')
-            hexes.add(HexCoord(int(loc_parts[0]), int(loc_parts[1]), int(loc_parts[2])))
-        return hexes
+        return set(map(_require_hex, self.setup_data["valid_hexes"]))
     
     def get_current_state_json(self) -> str:
         """Get the current state as a JSON string."""
         if self.moves and 0 <= self.current_move_index < len(self.moves):
-            return json.dumps(self.moves[self.current_move_index][1])
+            return self.moves[self.current_move_index][1]
         return "{}"
 
+    def get_current_state(self) -> Union[Dict, str]:
+        """Get the current state decoded to a dict (via orjson when available).
+
+        Moves aren't validated at load time, so a malformed state is returned as its
+        raw string; the visualizer's parser then reports it as a failed parse.
+        """
+        state_json = self.get_current_state_json()
+        try:
+            return _json_loads(state_json)
+        except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
+            return state_json
+
     def get_move_info(self) -> str:
         """Get info string about the current position."""
         if self.moves:
@@ -267,6 +288,15 @@ class SimpleReplayManager:
             return True
         return False
 
+    def step(self, delta: int) -> int:
+        """Move up to delta moves (negative = backward) in one jump; returns how many were moved."""
+        if not self.moves:
+            return 0
+        target = min(max(self.current_move_index + delta, 0), len(self.moves) - 1)
+        moved = abs(target - self.current_move_index)
+        self.current_move_index = target
+        return moved
+
 class ReplayBuffer:
     def __init__(self, buffer_size):
         self.buffer_size = buffer_size
@@ -2,10 +2,29 @@
 
 import sys
 sys.path.append("/media/robp/UD/Projects/mali_ba/open_spiel/python/games") # allow debugging in vs code
-from typing import Dict, List, Set, Optional, Tuple
+import functools
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Sequence, Set, Optional, Tuple
+import numpy as np
 from mali_ba.config import PlayerColor, MeepleColor, Phase
 from mali_ba.classes.classes_other import TradePost, City, HexCoord, TradeRoute
 
+# Player colors in seat order (EMPTY excluded); sliced per game instead of
+# re-enumerating the enum on every reset.
+_NON_EMPTY_PLAYER_COLORS = PlayerColor.ALL
+
+# Boards are rebuilt on every state reload; the cells only depend on the radius.
+@functools.lru_cache(maxsize=8)
+def _regular_board(radius: int) -> FrozenSet[HexCoord]:
+    # Build every (q, r) pair at once and keep those inside the hexagon.
+    # In cube coordinates s = -q - r, so q + r + s = 0 holds by construction.
+    axis = np.arange(-radius, radius + 1)
+    q, r = np.meshgrid(axis, axis, indexing='ij')
+    s = -q - r
+    mask = (r >= np.maximum(-radius, -q - radius)) & (r <= np.minimum(radius, -q + radius))
+    coords = np.stack([q[mask], r[mask], s[mask]], axis=1).tolist()
+    return frozenset(HexCoord(*coord) for coord in coords)
+
 # Simplified Python GameState - acts as a cache for visualization
 class GameStateCache:
     def __init__(self, num_players=3): # Default player num if not determined
@@ -20,19 +39,22 @@ class GameStateCache:
         self.hex_meeples: Dict[HexCoord, List[MeepleColor]] = {}
         self.player_posts_supply: List[int] = []
         self.trade_posts_locations: Dict[HexCoord, List[TradePost]] = {}
+        # Index of trade_posts_locations by owner; keep in sync when posts change
+        self.owner_posts: Dict[PlayerColor, Set[HexCoord]] = defaultdict(set)
         self.cities: List[City] = []
+        self.cities_by_hex: Dict[HexCoord, City] = {}
         self.common_goods: List[Dict[str, int]] = [{} for _ in range(num_players)]
         self.rare_goods: List[Dict[str, int]] = [{} for _ in range(num_players)]
         self.valid_hexes: Set[HexCoord] = set()
         self.grid_radius: int = 3 # Default
-        self.game_player_colors: List[PlayerColor] = list(PlayerColor)[1:num_players+1] # Exclude EMPTY
+        self.game_player_colors: Sequence[PlayerColor] = _NON_EMPTY_PLAYER_COLORS[:num_players]
         self.trade_routes: List[TradeRoute] = []
         self.next_route_id: int = 1
 
 
     def update_num_players(self, num_players):
         if not (2 <= num_players <= 5): return
-        self.game_player_colors = list(PlayerColor)[1:num_players+1]
+        self.game_player_colors = _NON_EMPTY_PLAYER_COLORS[:num_players]
         self.common_goods = [{} for _ in range(num_players)]
         self.rare_goods = [{} for _ in range(num_players)]
         self.player_posts_supply = [6] * num_players    # 6 is just the default
@@ -45,16 +67,8 @@ class GameStateCache:
 
     def generate_regular_board(self, radius: int) -> Set[HexCoord]:
         """Generate a regular hexagonal grid centered at origin with given radius."""
-        hexes = set()
-        # In cube coordinates, we need to ensure q + r + s = 0
-        for q in range(-radius, radius + 1):
-            # Calculate the range for r based on q to maintain a proper hexagon
-            r_min = max(-radius, -q - radius)
-            r_max = min(radius, -q + radius)
-            for r in range(r_min, r_max + 1):
-                s = -q - r  # This ensures q + r + s = 0
-                # No need for additional checks since the ranges ensure we're within the hexagon
-                hexes.add(HexCoord(q, r, s))
+        # Copy so callers can't mutate the cached board
+        hexes = set(_regular_board(radius))
 
         print(f"DEBUG: generate_regular_board created {len(hexes)} hexes with radius {radius}")
         if len(hexes) < 20:
@@ -64,7 +78,12 @@ class GameStateCache:
 
 
     def load_cities_from_config(self, city_config: List[Tuple[int, str, str, HexCoord, str, str]]):
-        self.cities = [City(*city_data) for city_data in city_config]
+        self.set_cities([City(*city_data) for city_data in city_config])
+
+    def set_cities(self, cities: List[City]):
+        """Replace the city list and rebuild the location index."""
+        self.cities = cities
+        self.cities_by_hex = {city.location: city for city in cities}
 
     def create_trade_route(self, player_color: PlayerColor, hexes: List[HexCoord] = None) -> TradeRoute:
         """Create a new trade route for a player"""
@@ -82,7 +101,7 @@ class GameStateCache:
         
     def get_hex_trade_routes(self, hex_coord: HexCoord) -> List[TradeRoute]:
         """Get all trade routes that include a specific hex."""
-        return [route for route in self.trade_routes if hex_coord in route.hexes]
+        return [route for route in self.trade_routes if route.has_hex(hex_coord)]
         
     def remove_trade_route(self, route_id: int) -> bool:
         """Remove a trade route by ID."""
@@ -95,35 +114,7 @@ class GameStateCache:
     def validate_trade_routes(self):
         """Check all trade routes for validity and update status."""
         for route in self.trade_routes:
-            # Check if all hexes in the route have the player's trading posts/centers
-            valid = True
-            for hex_coord in route.hexes:
-                has_player_post = False
-                posts = self.trade_posts_locations.get(hex_coord, [])
-                for post in posts:
-                    if post.owner == route.owner:
-                        has_player_post = True
-                        break
-                if not has_player_post:
-                    valid = False
-                    break
-                    
-            # Update the route's active status
-            route.active = valid
-            
-            # Calculate route value if it's valid
-            if valid:
-                # Find connected cities
-                connected_cities = []
-                for city in self.cities:
-                    if city.location in route.hexes:
-                        connected_cities.append(city)
-                        
-                # Calculate value (example: 1 common good per connected city)
-                goods = {}
-                for city in connected_cities:
-                    if city.common_good not in goods:
-                        goods[city.common_good] = 0
-                    goods[city.common_good] += 1
-                    
-                route.goods = goods
\ No newline at end of file
+            # Active only if the owner has a trading post/center on every hex
+            route.active = route.is_valid(self.owner_posts)
+            if route.active:
+                route.calculate_value(self.cities_by_hex)
\ No newline at end of file
@@ -13,6 +13,8 @@ INFO_PANEL_HEIGHT = 70 # Height for individual player info panels
 RESIZE_WAIT = 500
 # Default number of players
 DEFAULT_PLAYERS = 3
+# Maximum number of players (one per non-EMPTY PlayerColor)
+MAX_PLAYERS = 5
 # Default grid radius
 DEFAULT_GRID_RADIUS = 5
 # Default number of tokens per player
@@ -47,10 +49,13 @@ class PlayerColor(Enum):
 
     @classmethod
     def from_int(cls, value):
-        for item in cls:
-            if item.value == value:
-                return item
-        return cls.EMPTY # Default or error case
+        return _PLAYER_COLOR_BY_INT.get(value, cls.EMPTY) # EMPTY is the default or error case
+
+# Value -> member lookups used by the from_int helpers (hot during state parsing)
+_PLAYER_COLOR_BY_INT = {item.value: item for item in PlayerColor}
+
+# Player colors in seat order (EMPTY excluded); slice with [:num_players]
+PlayerColor.ALL = tuple(PlayerColor.from_int(i) for i in range(MAX_PLAYERS))
 
 PLAYER_COLOR_DICT = {
     PlayerColor.RED: RED,
@@ -76,10 +81,9 @@ class MeepleColor(Enum):
 
     @classmethod
     def from_int(cls, value):
-        for item in cls:
-            if item.value == value:
-                return item
-        return cls.EMPTY
+        return _MEEPLE_COLOR_BY_INT.get(value, cls.EMPTY)
+
+_MEEPLE_COLOR_BY_INT = {item.value: item for item in MeepleColor}
 
 MEEPLE_COLOR_DICT = {
     MeepleColor.SOLID_BLACK: BLACK,
@@ -105,12 +109,14 @@ class Phase(Enum):
 
     @classmethod
     def from_int(cls, value):
-        for item in cls:
-            if item.value == value:
-                return item
+        item = _PHASE_BY_INT.get(value)
+        if item is not None:
+            return item
         print(f"Warning: Unknown Phase value {value} received. Defaulting to EMPTY.")
         return cls.EMPTY
 
+_PHASE_BY_INT = {item.value: item for item in Phase}
+
 class TradePostType(Enum):
     NONE = 0
     POST = 1
@@ -118,10 +124,9 @@ class TradePostType(Enum):
 
     @classmethod
     def from_int(cls, value):
-        for item in cls:
-            if item.value == value:
-                return item
-        return cls.NONE
+        return _TRADE_POST_TYPE_BY_INT.get(value, cls.NONE)
+
+_TRADE_POST_TYPE_BY_INT = {item.value: item for item in TradePostType}
 
 CITY_DATA = [
     (1, "Agadez", "Tuareg", "Iron work", "Silver cross"),
@@ -5,30 +5,23 @@ os.environ['ASAN_OPTIONS'] = 'allocator_may_return_null=1'
 import sys
 import argparse
 import traceback
-from typing import List
-import time
+import functools
+from typing import List, TYPE_CHECKING
+from pathlib import Path
 import pygame
 
 # --- Path Setup ---
-# (Path setup logic remains the same)
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(current_dir)
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
-build_dir = os.path.join(os.path.dirname(os.path.dirname(project_root)), "build", "python")
-if build_dir not in sys.path:
-    sys.path.insert(0, build_dir)
-
-try:
-    import pyspiel
-    print("pyspiel imported successfully.")
-except ImportError:
-    print("FATAL ERROR: pyspiel module not found.")
-    sys.exit(1)
+# abspath (not resolve) so a symlinked package dir still finds the checkout's build
+_HERE = Path(os.path.abspath(__file__)).parent
+project_root = str(_HERE.parent)                          # .../python/games
+build_dir = str(_HERE.parents[2] / "build" / "python")    # .../open_spiel/build/python
+for _p in (project_root, build_dir):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
 
 # --- Project Module Imports ---
-from mali_ba.utils.cpp_interface import GameInterface
-from mali_ba.utils.simple_ai_integration import create_game_interface_with_ai
+# The C++ side (pyspiel, GameInterface, AI integration) and the replay manager
+# are imported by the mode that needs them, so replay runs never load pyspiel.
 from mali_ba.config import PlayerColor, DEFAULT_PLAYERS
 from mali_ba.ui.visualizer import BoardVisualizer
 from mali_ba.utils.board_config import add_board_config_args
@@ -38,14 +31,124 @@ from mali_ba.utils.player_config import (
     GamePlayerConfig,
     PlayerType
 )
-from mali_ba.classes.classes_other import SimpleReplayManager
+if TYPE_CHECKING:
+    from mali_ba.utils.cpp_interface import GameInterface
+
+# All modes create the visualizer after pygame has been initialized here
+_make_visualizer = functools.partial(BoardVisualizer, initialize_pygame=False)
 
 # --- Mode Constants ---
 MODE_GUI_SYNC_CPP = "gui_sync_cpp"
 MODE_CPP_SYNC_GUI = "cpp_sync_gui"
 MODE_GUI_REPLAY = "gui_replay"
 
-def run_cpp_sync_gui_loop(game_interface: GameInterface, visualizer: BoardVisualizer):
+DEFAULT_UPDATE_INTERVAL = 0.5 # Seconds between C++ random moves in cpp_sync_gui
+DEFAULT_MOVES_PER_UPDATE = 1 # Random moves C++ plays per update in cpp_sync_gui
+
+def _update_interval(value: str) -> float:
+    """argparse type for --update_interval: seconds, bounded to a sane range."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid update interval '{value}'")
+    if not 0.01 <= seconds <= 60.0:
+        raise argparse.ArgumentTypeError(f"update interval must be between 0.01 and 60 seconds, got {seconds}")
+    return seconds
+
+def _moves_per_update(value: str) -> int:
+    """argparse type for --moves_per_update: a positive move count."""
+    try:
+        moves = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid moves per update '{value}'")
+    if moves < 1:
+        raise argparse.ArgumentTypeError(f"moves per update must be at least 1, got {moves}")
+    return moves
+
+# --- cpp_sync_gui event handling ---
+# Loop/handler messages go straight to stderr: no print() formatting or stdout
+# flush stalling the GUI thread (messages are pre-formatted, newline included).
+_log = sys.stderr.write
+
+# Posted by SDL every update interval while C++ is playing (stopped when paused).
+MOVE_TICK = pygame.event.custom_type()
+
+class _SyncLoopContext:
+    """Mutable loop state shared by the cpp_sync_gui event handlers."""
+    def __init__(self, game_interface: 'GameInterface', visualizer: BoardVisualizer,
+                 update_interval: float = DEFAULT_UPDATE_INTERVAL,
+                 moves_per_update: int = DEFAULT_MOVES_PER_UPDATE):
+        self.game_interface = game_interface
+        self.visualizer = visualizer
+        self.running = True
+        self.paused = False
+        self.game_is_over = False # New flag to manage the end-of-game state
+        self.update_interval_ms = int(update_interval * 1000)
+        self.moves_per_update = moves_per_update # Random moves C++ plays per update (one batched call)
+        self.cpp_is_terminal = game_interface.spiel_state.is_terminal()
+        self.final_returns = [] # Filled in by the batch call that ends the game
+
+    def set_move_timer(self, enabled: bool):
+        pygame.time.set_timer(MOVE_TICK, self.update_interval_ms if enabled else 0)
+
+def _on_quit(event, ctx: _SyncLoopContext):
+    ctx.running = False
+
+def _on_resize(event, ctx: _SyncLoopContext):
+    ctx.visualizer.handle_window_resize(event.size[0], event.size[1])
+
+def _on_expose(event, ctx: _SyncLoopContext):
+    ctx.visualizer.dirty = True # Window uncovered/restored; repaint
+
+def _on_move_tick(event, ctx: _SyncLoopContext):
+    # A tick may already be queued when pausing; ignore it
+    if ctx.paused or ctx.game_is_over:
+        return
+    # C++ makes its moves and reports terminality in the same call
+    success, msg, ctx.cpp_is_terminal, ctx.final_returns, new_state = \
+        ctx.game_interface.play_random_batch(ctx.moves_per_update)
+    if success:
+        ctx.visualizer.parse_and_update_state(new_state)
+    else:
+        _log(f"C++ move failed: {msg}\n")
+        ctx.running = False # Stop if something goes wrong
+
+def _on_escape(event, ctx: _SyncLoopContext):
+    ctx.running = False
+
+def _on_pause(event, ctx: _SyncLoopContext):
+    ctx.paused = not ctx.paused
+    if not ctx.game_is_over: # Only change status if game is not over
+        ctx.set_move_timer(not ctx.paused)
+        status = "PAUSED" if ctx.paused else "C++ playing..."
+        ctx.visualizer.control_panel.update_status(f"Game {status}")
+
+KEYDOWN_HANDLERS = {
+    pygame.K_ESCAPE: _on_escape,
+    pygame.K_p: _on_pause,
+}
+
+def _on_keydown(event, ctx: _SyncLoopContext):
+    handler = KEYDOWN_HANDLERS.get(event.key)
+    if handler:
+        handler(event, ctx)
+
+EVENT_HANDLERS = {
+    pygame.QUIT: _on_quit,
+    pygame.VIDEORESIZE: _on_resize,
+    pygame.VIDEOEXPOSE: _on_expose,
+    pygame.KEYDOWN: _on_keydown,
+    MOVE_TICK: _on_move_tick,
+}
+
+def _init_pygame():
+    """Initialize only the SDL subsystems the visualizer uses (no audio/joystick)."""
+    pygame.display.init()
+    pygame.font.init()
+
+def run_cpp_sync_gui_loop(game_interface: 'GameInterface', visualizer: BoardVisualizer,
+                          update_interval: float = DEFAULT_UPDATE_INTERVAL,
+                          moves_per_update: int = DEFAULT_MOVES_PER_UPDATE):
     """
     Runs the game loop where C++ plays random moves and the GUI displays.
     """
@@ -56,62 +159,54 @@ def run_cpp_sync_gui_loop(game_interface: GameInterface, visualizer: BoardVisual
     print("--- Starting C++ Sync GUI Loop ---")
     print("Controls: ESC = Exit, P = Pause/Unpause")
     
-    running = True
-    paused = False
-    game_is_over = False # New flag to manage the end-of-game state
+    ctx = _SyncLoopContext(game_interface, visualizer, update_interval, moves_per_update)
     
     visualizer.control_panel.update_status("C++ playing random moves... (Press P to pause)")
     visualizer.draw()
 
-    last_update_time = time.time()
-    update_interval = 0.5
-
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.VIDEORESIZE:
-                visualizer.handle_window_resize(event.size[0], event.size[1])
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    running = False
-                elif event.key == pygame.K_p:
-                    paused = not paused
-                    if not game_is_over: # Only change status if game is not over
-                        status = "PAUSED" if paused else "C++ playing..."
-                        visualizer.control_panel.update_status(f"Game {status}")
-        
-        # --- Main Game Logic ---
-        # Only process moves if the game is not over and not paused
-        if not game_is_over and not paused:
-            if time.time() - last_update_time > update_interval:
-                # C++ makes a move
-                action_string = "play_random_move"
-                success, msg, new_state_json = game_interface.apply_action(action_string)
+    # Hoist hot attribute lookups out of the loop
+    event_wait = pygame.event.wait
+    event_get = pygame.event.get
+    get_handler = EVENT_HANDLERS.get
+    draw = visualizer.draw
+    control_panel = visualizer.control_panel
+
+    # SDL posts MOVE_TICK on schedule; the loop just sleeps in event_wait() until
+    # the next tick or user input arrives.
+    ctx.set_move_timer(not ctx.cpp_is_terminal)
+    try:
+        while ctx.running:
+            events = event_get()
+            if not events:
+                events = [event_wait()]
+
+            for event in events:
+                handler = get_handler(event.type)
+                if handler:
+                    handler(event, ctx)
+
+            # --- Check for Terminal State (after a move has been made) ---
+            if not ctx.game_is_over and ctx.cpp_is_terminal:
+                _log("\n--- GAME IS TERMINAL ---\n")
+                ctx.game_is_over = True
+                ctx.paused = True # Pause the simulation automatically
+                ctx.set_move_timer(False)
                 
-                if success:
-                    visualizer.parse_and_update_state(new_state_json)
-                else:
-                    print(f"C++ move failed: {msg}")
-                    running = False # Stop if something goes wrong
-                last_update_time = time.time()
-
-        # --- Check for Terminal State (after a move has been made) ---
-        if not game_is_over and game_interface.spiel_state.is_terminal():
-            print("\n--- GAME IS TERMINAL ---")
-            game_is_over = True
-            paused = True # Pause the simulation automatically
-            
-            # --- THIS IS THE CRUCIAL PART ---
-            # Call the C++ Returns() function to trigger the score calculation and logging.
-            print("--- Requesting Final Scores from C++ Backend... ---")
-            final_returns = game_interface.spiel_state.returns()
-            print(f"--- Python received final training returns: {final_returns} ---")
-            
-            visualizer.control_panel.update_status(f"GAME OVER. Final Returns: {final_returns}")
+                # --- THIS IS THE CRUCIAL PART ---
+                # C++ Returns() triggers the score calculation and logging. The batch call
+                # that ended the game already ran it; only ask again if we started terminal.
+                if not ctx.final_returns:
+                    _log("--- Requesting Final Scores from C++ Backend... ---\n")
+                    ctx.final_returns = game_interface.spiel_state.returns()
+                _log(f"--- Python received final training returns: {ctx.final_returns} ---\n")
+                
+                visualizer.control_panel.update_status(f"GAME OVER. Final Returns: {ctx.final_returns}")
 
-        visualizer.draw()
-        visualizer.clock.tick(30)
+            # Only repaint when a state update, resize or status change dirtied the frame
+            if visualizer.dirty or control_panel.dirty:
+                draw()
+    finally:
+        ctx.set_move_timer(False)
         
     print("--- Exiting C++ Sync GUI Loop ---")
 
@@ -135,6 +230,19 @@ def main():
         help='Enable move logging to create replay files for debugging.'
     )
     
+    parser.add_argument(
+        '--update_interval',
+        type=_update_interval,
+        default=DEFAULT_UPDATE_INTERVAL,
+        help='Seconds between C++ random moves in cpp_sync_gui mode (0.01-60).'
+    )
+    parser.add_argument(
+        '--moves_per_update',
+        type=_moves_per_update,
+        default=DEFAULT_MOVES_PER_UPDATE,
+        help='Random moves C++ plays per update in cpp_sync_gui mode, in one call (>= 1).'
+    )
+
     # In replay mode, config_file argument is repurposed for the replay file
     parser.add_argument('--replay_file', type=str, help='Path to the replay log file for gui_replay mode.')
 
@@ -150,11 +258,12 @@ def main():
     args = parser.parse_args()
 
     try:
-        pygame.init()
-
+        # SDL is brought up just before the visualizer is created, so a bad
+        # replay file or C++ config exits without paying for it.
         if args.mode == MODE_GUI_REPLAY:
             # --- Replay Mode ---
             print("🎬 Initializing GUI Replay Mode...")
+            from mali_ba.classes.classes_other import SimpleReplayManager
             replay_manager = SimpleReplayManager()
             
             # Use --replay_file argument for clarity
@@ -164,18 +273,27 @@ def main():
                 return
 
             num_players = replay_manager.get_num_players() or DEFAULT_PLAYERS
-            game_player_colors = [PlayerColor.from_int(i) for i in range(num_players)]
+            game_player_colors = PlayerColor.ALL[:num_players]
             
-            visualizer = BoardVisualizer(
+            _init_pygame()
+            visualizer = _make_visualizer(
                 game_interface=None,
                 game_player_colors=game_player_colors,
-                initialize_pygame=False,
                 replay_manager=replay_manager  # Pass the manager during construction
             )
             visualizer.run()
 
         else:
             # --- Live C++ Modes ---
+            try:
+                import pyspiel
+                print("pyspiel imported successfully.")
+            except ImportError:
+                print("FATAL ERROR: pyspiel module not found.")
+                sys.exit(1)
+            from mali_ba.utils.cpp_interface import GameInterface
+            from mali_ba.utils.simple_ai_integration import create_game_interface_with_ai
+
             # First, create a temporary game interface to get number of players
             temp_interface = GameInterface(config_file_path=args.config_file)
             num_players = temp_interface.get_num_players()
@@ -210,12 +328,12 @@ def main():
             )
             
             num_players = game_interface.get_num_players()
-            game_player_colors = [PlayerColor.from_int(i) for i in range(num_players)]
+            game_player_colors = PlayerColor.ALL[:num_players]
 
-            visualizer = BoardVisualizer(
+            _init_pygame()
+            visualizer = _make_visualizer(
                 game_interface=game_interface,
                 game_player_colors=game_player_colors,
-                initialize_pygame=False,
                 replay_manager=None # Explicitly None for live modes
             )
 
@@ -224,7 +342,7 @@ def main():
                 visualizer.run()
             elif args.mode == MODE_CPP_SYNC_GUI:
                 print("🤖 Starting C++ driven GUI loop...")
-                run_cpp_sync_gui_loop(game_interface, visualizer)
+                run_cpp_sync_gui_loop(game_interface, visualizer, args.update_interval, args.moves_per_update)
 
     except Exception as e:
         print(f"\n--- An Error Occurred in Main ---")
@@ -8,9 +8,12 @@ setup(
         "mali_ba": ["*.py"],  # Include all Python files at the root level
     },
     install_requires=[
+        "numpy",
         "pygame",
     ],
     description="Mali-Ba board game implementation using OpenSpiel",
     author="Rob Parker",
     python_requires=">=3.7",
+    # Byte-compile at build time so a fresh install never parses sources on first run
+    options={"build_py": {"compile": True}},
 )
\ No newline at end of file
@@ -4,6 +4,8 @@ import argparse
 import random
 import time
 import collections
+import queue
+import threading
 
 # Path setup should be done early
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -16,18 +18,150 @@ if python_games_dir not in sys.path: sys.path.insert(0, python_games_dir)
 # We need to import the MP components at the top level for the __main__ guard
 import multiprocessing as mp
 from multiprocessing import Process, Queue
-
-# Constant for gathering updated weights
-WEIGHTS_UPDATE_INTERVAL_SECONDS = 15
+from multiprocessing import connection as mp_connection
+try:
+    # Optional: shared-memory queue with batched put/get for the replay hand-off
+    import faster_fifo
+except ImportError:
+    faster_fifo = None
+
+# How often the learner polls actors for exits (is_alive() is a waitpid per actor)
+ACTOR_HEALTH_CHECK_INTERVAL_SECONDS = 1.0
+
+# Per-move MCTS debug logging in actor_process; set MALI_BA_DEBUG_MOVES=0 to skip it
+LOG_DEBUG_MOVES = os.environ.get("MALI_BA_DEBUG_MOVES", "1") != "0"
+# Per-move INFO lines (placements, moves played); set MALI_BA_LOG_MOVES=0 to skip them
+LOG_MOVES = os.environ.get("MALI_BA_LOG_MOVES", "1") != "0"
+# Learner log level (MALI_BA_LOGLEVEL=DEBUG/INFO/WARN/ERROR, default INFO, like the C++ side);
+# the hot loop checks these flags before building any message arguments
+LOG_LEVEL = os.environ.get("MALI_BA_LOGLEVEL", "INFO").upper()
+LOG_DEBUG_ENABLED = LOG_LEVEL == "DEBUG"
+LOG_INFO_ENABLED = LOG_LEVEL in ("DEBUG", "INFO")
+# Train in mixed_float16 when the trainer has a GPU; set MALI_BA_MIXED_PRECISION=0 to keep float32
+MIXED_PRECISION = os.environ.get("MALI_BA_MIXED_PRECISION", "1") != "0"
+DEBUG_ACTION_CATEGORIES = ('income', 'mancala', 'upgrade', 'pass', 'other')
+
+# Cores kept free of actors for the trainer and the learner loop
+TRAINER_RESERVED_CORES = 2
+
+# Discount factor for value targets. Rewards further in the future are worth slightly less.
+GAMMA = 0.99
+
+# Shared-memory trajectory slots per actor: one being played, one waiting in
+# result_queue, one queued for the trainer, and one spare so actors rarely wait
+TRAJECTORY_SLOTS_PER_ACTOR = 4
+
+# --- Helper Functions ---
+
+def get_actor_cores():
+    """Cores actors may be pinned to: the usable set minus the ones reserved for the trainer."""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    return cores[TRAINER_RESERVED_CORES:] or cores
+
+def make_batch_queue(max_items, item_bytes):
+    """Queue of small messages between processes: faster_fifo if installed, else mp.Queue."""
+    if faster_fifo is not None:
+        return faster_fifo.Queue(max_size_bytes=max_items * item_bytes)
+    return mp.Queue(maxsize=max_items)
+
+def put_batch(q, batch):
+    """Queue several messages at once. Returns how many were accepted before the queue filled."""
+    if faster_fifo is not None and isinstance(q, faster_fifo.Queue):
+        try:
+            q.put_many_nowait(batch)  # One lock and one write for the whole batch
+            return len(batch)
+        except queue.Full:
+            return 0
+    for i, item in enumerate(batch):
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            return i
+    return len(batch)
+
+def get_batch(q, max_items, timeout):
+    """Wait up to `timeout` for the first message, then take up to `max_items` that are ready.
+    Raises queue.Empty if nothing arrived."""
+    if faster_fifo is not None and isinstance(q, faster_fifo.Queue):
+        return q.get_many(timeout=timeout, max_messages_to_get=max_items)
+    items = [q.get(timeout=timeout)]
+    try:
+        while len(items) < max_items:
+            items.append(q.get_nowait())
+    except queue.Empty:
+        pass
+    return items
+
+def messages_waiting(queues):
+    """Queues from `queues` that may have messages. Stdlib mp.Queues are checked with one
+    non-blocking multiprocessing.connection.wait() over their pipes' reader ends; any other
+    queue type is always returned, for the caller to poll with get_nowait()."""
+    readers = {}
+    polled = []
+    for q in queues:
+        reader = getattr(q, "_reader", None)  # Private to the stdlib mp.Queue
+        if reader is None:
+            polled.append(q)
+        else:
+            readers[reader] = q
+    if readers:
+        polled.extend(readers[r] for r in mp_connection.wait(list(readers), timeout=0))
+    return polled
+
+def get_latest_nowait(q):
+    """Drain `q` without blocking and return only its newest item (None if it was empty).
+    Relies on queue.Empty rather than the racy empty()/qsize() checks."""
+    latest = None
+    while True:
+        try:
+            latest = q.get_nowait()
+        except queue.Empty:
+            return latest
+
+def start_log_writer(log):
+    """Run `log` on a background thread. Returns (log_async, stop): log_async(level, template, *args)
+    only enqueues, leaving str.format() and the write to the thread; stop() flushes and joins it."""
+    pending = queue.SimpleQueue()
+
+    def writer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            level, template, template_args = item
+            log(level, template.format(*template_args))
+
+    thread = threading.Thread(target=writer, name="learner-log", daemon=True)
+    thread.start()
+
+    def log_async(level, template, *template_args):
+        pending.put((level, template, template_args))
+
+    def stop():
+        pending.put(None)
+        thread.join()
+
+    return log_async, stop
+
+def pin_actor_to_core(cpu_core, tf):
+    """Pin this actor to one core and keep TensorFlow to a single thread per pool,
+    so N actors do not oversubscribe the machine with N x K TF threads."""
+    if cpu_core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu_core})
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
 
 # --- Child Process Functions ---
 
-def trainer_process(args, initial_game_params, replay_buffer_queue, weights_queue, stats_queue):
+def trainer_process(args, initial_game_params, replay_buffer_queue, weights_queue, stats_queue, weights_lock, shared_weights_version, shared_trajectories):
     """A dedicated process for training the model."""
     # --- IMPORTS ARE THE VERY FIRST THING ---
     import tensorflow as tf
     import pyspiel
-    from mali_ba.training_utils import SimpleAgent
+    from mali_ba.training_utils import SimpleAgent, SharedTrajectorySlots, SharedWeights
     from pyspiel.mali_ba import log, LogLevel
     # This import can be removed, as the ReplayBuffer is local now
     # from mali_ba.classes.classes_other import ReplayBuffer
@@ -44,13 +178,14 @@ def trainer_process(args, initial_game_params, replay_buffer_queue, weights_queu
     log(LogLevel.INFO, "Trainer process started.")
 
     temp_game = pyspiel.load_game(args.game_name, initial_game_params)
-    agent = SimpleAgent(
-        temp_game.observation_tensor_shape(),
-        temp_game.num_distinct_actions(),
-        temp_game.num_players(),
-        args.learning_rate
-    )
+    obs_shape = tuple(temp_game.observation_tensor_shape())
+    observation_size = temp_game.observation_tensor_size()
+    num_actions = temp_game.num_distinct_actions()
+    num_players = temp_game.num_players()
     del temp_game
+    # Mixed precision only pays off on tensor-core GPUs; on CPU float16 convolutions are slower
+    agent = SimpleAgent(obs_shape, num_actions, num_players, args.learning_rate,
+                        mixed_precision=MIXED_PRECISION and bool(gpus))
 
     if args.load_model_path and os.path.exists(args.load_model_path.replace("weights.h5", "_policy.weights.h5")):
         try:
@@ -61,32 +196,47 @@ def trainer_process(args, initial_game_params, replay_buffer_queue, weights_queu
     else:
         log(LogLevel.WARN, f"Can't find load model file. Starting from scratch.")
     
-    # ### <<< CORRECTION 1: Put a TUPLE of weights on the queue.
-    weights_queue.put((agent.policy_model.get_weights(), agent.value_model.get_weights()))
-
-    # Re-importing here is fine, or just remove the one at the top.
-    from mali_ba.classes.classes_other import ReplayBuffer
-
-    local_replay_buffer = ReplayBuffer(args.replay_buffer_size)
+    # Weights live in shared memory. The first message on the queue is the layout
+    # of both blocks; after that only a version number is sent per update.
+    policy_weights_shm = SharedWeights.from_weights(agent.policy_model.get_weights())
+    value_weights_shm = SharedWeights.from_weights(agent.value_model.get_weights())
+    weights_version = 0
+    weights_queue.put((policy_weights_shm.spec(), value_weights_shm.spec()))
+
+    # Preallocated NumPy ring buffer; overwrites the oldest experiences when full
+    from mali_ba.training_utils import ReplayBuffer
+
+    local_replay_buffer = ReplayBuffer(args.replay_buffer_size, observation_size, num_actions, num_players)
+    # Finished games arrive as (slot_id, length): the actor has already written the
+    # value targets into the slot's reward rows, so the rows are copied straight in
+    free_slot_queue, slots_spec, _ = shared_trajectories
+    trajectory_slots = SharedTrajectorySlots.attach(slots_spec)
     training_counter = 0
     last_save_time = time.time()
     
     while True:
-        # Process all available experiences without blocking
+        # Wait briefly for the first finished game, then drain whatever else is ready
         experiences_processed = 0
-        max_experiences_per_cycle = args.batch_size * 4  # Process in chunks
+        max_games_per_cycle = len(trajectory_slots.slots)
         
         try:
-            while experiences_processed < max_experiences_per_cycle:
-                experience = replay_buffer_queue.get_nowait()  # Non-blocking get
-                if experience is None:
-                    log(LogLevel.INFO, "Trainer received shutdown signal. Saving final model.")
-                    agent.save_model(args.save_model_path)
-                    return
-                local_replay_buffer.add(experience)
-                experiences_processed += 1
-        except:  # Queue empty - this is normal and expected
-            pass
+            games = get_batch(replay_buffer_queue, max_games_per_cycle, timeout=0.5)
+        except queue.Empty:  # Nothing waiting - this is normal and expected
+            games = []
+        for game_slot in games:
+            if game_slot is None:
+                log(LogLevel.INFO, "Trainer received shutdown signal. Saving final model.")
+                agent.save_model(args.save_model_path)
+                policy_weights_shm.close(unlink=True)
+                value_weights_shm.close(unlink=True)
+                trajectory_slots.close()
+                return
+            slot_id, game_length = game_slot
+            trajectory = trajectory_slots.slots[slot_id]
+            trajectory.length = game_length
+            local_replay_buffer.add_trajectory(*trajectory.arrays())
+            free_slot_queue.put(slot_id)
+            experiences_processed += game_length
         
         if experiences_processed > 0:
              # Log less frequently to reduce log spam
@@ -110,10 +260,15 @@ def trainer_process(args, initial_game_params, replay_buffer_queue, weights_queu
                     import traceback
                     log(LogLevel.ERROR, f"Trainer: Full traceback: {traceback.format_exc()}")
                 
-                # Update weights for actors after a successful training step
+                # Update weights for actors after a successful training step. Actors poll the
+                # shared version, so the queue message only keeps the learner informed.
+                with weights_lock:
+                    policy_weights_shm.write(agent.policy_model.get_weights())
+                    value_weights_shm.write(agent.value_model.get_weights())
+                    weights_version += 1
+                    shared_weights_version.value = weights_version
                 if weights_queue.empty():
-                    # ### <<< CORRECTION 2: Put a TUPLE of weights on the queue here as well.
-                    weights_queue.put((agent.policy_model.get_weights(), agent.value_model.get_weights()))
+                    weights_queue.put(weights_version)
 
         # Periodic model saving
         current_time = time.time()
@@ -126,20 +281,8 @@ def trainer_process(args, initial_game_params, replay_buffer_queue, weights_queu
                 # The agent's save_model will also log, but we add one here too.
                 log(LogLevel.ERROR, f"Trainer: agent.save_model failed inside periodic save. Error: {e}")
 
-        # Prune the buffer if it's almost full
-        if len(local_replay_buffer) > args.replay_buffer_size * 0.95:
-            log(LogLevel.INFO, "Pruning replay buffer...")
-            remove_count = int(args.replay_buffer_size * 0.1)
-            for _ in range(remove_count):
-                if len(local_replay_buffer) > 0:
-                    local_replay_buffer.buffer.popleft()
-
-        # If there's nothing to do, sleep briefly to prevent busy-waiting
-        if experiences_processed == 0 and len(local_replay_buffer) < args.batch_size:
-            time.sleep(0.1)
 
-
-def actor_process(actor_id, game_params, args, job_queue, result_queue, games_per_actor):
+def actor_process(actor_id, game_params, args, job_queue, result_queue, games_per_actor, shared_weights, shared_trajectories, cpu_core=None):
     # --- (Delayed imports are the same and correct) ---
     import numpy as np
     import random
@@ -148,11 +291,12 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
     from pyspiel import mali_ba
     from pyspiel.mali_ba import log, LogLevel
     import tensorflow as tf
-    from mali_ba.training_utils import AlphaZeroEvaluator, create_mali_ba_policy_network, create_mali_ba_value_network
+    from mali_ba.training_utils import AlphaZeroEvaluator, SharedTrajectorySlots, SharedWeights, discount_returns_inplace, mcts_visit_policy, quantize_observation, create_mali_ba_policy_network, create_mali_ba_value_network
 
     os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
     tf.config.set_visible_devices([], 'GPU')
-    log(LogLevel.INFO, f"Actor {actor_id} started, configured for CPU-only execution.")
+    pin_actor_to_core(cpu_core, tf)
+    log(LogLevel.INFO, f"Actor {actor_id} started, configured for CPU-only execution on core {cpu_core}.")
 
     # --- Create ONE game object and ONE model for the actor's lifetime ---
     log(LogLevel.INFO, f"Actor {actor_id}: Initializing its game instance and model.")
@@ -160,20 +304,64 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
         # Get the max game length
     max_game_length = game.get_max_game_length()
     log(LogLevel.INFO, f"Using max game length: {max_game_length}")
+    # Game invariants, read once instead of crossing into C++ every move
+    obs_shape = tuple(game.observation_tensor_shape())
+    num_actions = game.num_distinct_actions()
+    num_players = game.num_players()
 
     # Create instances of both networks
-    policy_model = create_mali_ba_policy_network(game.observation_tensor_shape(), game.num_distinct_actions())
-    value_model = create_mali_ba_value_network(game.observation_tensor_shape(), game.num_players())
+    policy_model = create_mali_ba_policy_network(obs_shape, num_actions)
+    value_model = create_mali_ba_value_network(obs_shape, num_players)
+
+    # Trajectories are written straight into the learner's shared-memory slots. The C++
+    # state fills one float32 scratch row, which is stored in the slot as uint8.
+    free_slot_queue, slots_spec, slot_owners = shared_trajectories
+    trajectory_slots = SharedTrajectorySlots.attach(slots_spec)
+    observation = np.empty(game.observation_tensor_size(), dtype=np.float32)
+    # Debug-only cache: action id -> index into DEBUG_ACTION_CATEGORIES
+    action_categories = {}
+    # Per-move log lines, flushed with a single log() call at the end of each game
+    move_log = []
+
+    # Attach to the trainer's shared-memory weight blocks once
+    weights_lock, shared_weights_version, policy_spec, value_spec = shared_weights
+    policy_weights_shm = SharedWeights.attach(policy_spec)
+    value_weights_shm = SharedWeights.attach(value_spec)
+    loaded_weights_version = None
+    # Cache the variable lists once; .weights is the order get_weights()/set_weights() use
+    policy_vars = policy_model.weights
+    value_vars = value_model.weights
+
+    # Pass both models to the evaluator. Weight updates are assigned into the same
+    # models, so one evaluator and one bot serve every game; MCTSBot keeps no
+    # search tree between mcts_search() calls.
+    evaluator = AlphaZeroEvaluator(game, policy_model, value_model)
+    
+    bot = mcts.MCTSBot(
+        game=game, uct_c=args.uct_c, max_simulations=args.max_simulations,
+        evaluator=evaluator, solve=False,
+        # The first value (alpha) controls the shape of the noise. A lower
+        # alpha creates more "spiky" noise, forcing exploration of
+        # a few non-policy moves. The default is 0.3. Let's make it stronger.
+        dirichlet_noise=(0.2, 0.25), 
+        child_selection_fn=mcts.SearchNode.puct_value, verbose=False)
 
     for _ in range(args.games_per_actor):
         job = job_queue.get()
         if job is None:  break
 
-        episode_num, (policy_weights, value_weights), game_rng_seed = job
+        # Jobs carry no weights; the shared version counter says when to reload them
+        episode_num, game_rng_seed = job
         
-        # Set weights on the two separate models
-        policy_model.set_weights(policy_weights)
-        value_model.set_weights(value_weights)
+        # Reload the two separate models only when the trainer has published new weights
+        if shared_weights_version.value != loaded_weights_version:
+            # Assign straight from the shared-memory views, skipping Keras' set_weights bookkeeping
+            with weights_lock:
+                for var, weight in zip(policy_vars, policy_weights_shm.views):
+                    var.assign(weight)
+                for var, weight in zip(value_vars, value_weights_shm.views):
+                    var.assign(weight)
+                loaded_weights_version = shared_weights_version.value
         
         random.seed(game_rng_seed)
         np.random.seed(game_rng_seed)
@@ -194,22 +382,17 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
         # MCTS bot's own randomness (dirichlet noise, policy sampling) will
         # provide sufficient exploration.
 
-        # Pass both models to the evaluator
-        evaluator = AlphaZeroEvaluator(game, policy_model, value_model)
+        # The evaluator and bot are reused across games; only drop cached leaf predictions,
+        # which may come from the previous weights
+        evaluator.reset()
         
-        bot = mcts.MCTSBot(
-            game=game, uct_c=args.uct_c, max_simulations=args.max_simulations,
-            evaluator=evaluator, solve=False,
-            # The first value (alpha) controls the shape of the noise. A lower
-            # alpha creates more "spiky" noise, forcing exploration of
-            # a few non-policy moves. The default is 0.3. Let's make it stronger.
-            dirichlet_noise=(0.2, 0.25), 
-            child_selection_fn=mcts.SearchNode.puct_value, verbose=False)
+        # Take a free shared-memory slot to record this game into; the learner reclaims
+        # it if this actor dies before handing it back
+        slot_id = free_slot_queue.get()
+        slot_owners[slot_id] = actor_id
+        trajectory = trajectory_slots.slots[slot_id]
 
-        state = game.new_initial_state()
-        
         # Chance node startup
-        episode_trajectory = []
         if state.is_chance_node():
             state.apply_action(state.legal_actions()[0])
 
@@ -232,8 +415,9 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
                 action = random.choice(legal_actions)
                 
                 # Optional: Log the placement move
-                action_str = mali_ba_state.action_to_string(mali_ba_state.current_player(), action)
-                log(LogLevel.INFO, f"Actor {actor_id}, Game {episode_num}: Placing token with action '{action_str}'")
+                if LOG_MOVES:
+                    action_str = mali_ba_state.action_to_string(mali_ba_state.current_player(), action)
+                    move_log.append(f"Actor {actor_id}, Game {episode_num}: Placing token with action '{action_str}'")
 
                 mali_ba_state.apply_action(action)
             # --- END OF OPTIMIZATION ---
@@ -243,7 +427,11 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
 
         # Switch to PLAY mode
         while not state.is_terminal():
-            observation = np.array(state.observation_tensor(), dtype=np.float32)
+            if move_count >= trajectory.max_length:
+                log(LogLevel.WARN, f"Actor {actor_id}, Game {episode_num}: Trajectory reached {trajectory.max_length} moves. Stopping.")
+                break
+            mali_ba_state.observation_tensor_into(observation)
+            quantize_observation(observation, trajectory.observations[move_count])
             # # DEBUG ======================================================================
             # log(LogLevel.INFO, f"Raw observation shape: {observation.shape}")
             # log(LogLevel.INFO, f"Raw observation range: min={np.min(observation)}, max={np.max(observation)}")
@@ -263,106 +451,82 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
             #===============================================================
             # DEBUG to see what choices the bot has
             #===============================================================
-            if move_count < 20 and player >= 0:  # Only debug first moves
-                #legal_actions = state.legal_actions()
-                log(LogLevel.INFO, f"Actor {actor_id}, Game {episode_num}, Move {move_count}: DEBUG")
-                log(LogLevel.INFO, f"  Legal actions ({len(legal_actions)}): {legal_actions[:10]}...")  # Show first 10
+            if LOG_DEBUG_MOVES and move_count < 20 and player >= 0:  # Only debug first moves
+                move_log.append(f"Actor {actor_id}, Game {episode_num}, Move {move_count}: DEBUG")
+                move_log.append(f"  Legal actions ({len(legal_actions)}): {legal_actions[:10]}...")  # Show first 10
                 
                 # Get neural network predictions
-                observation = np.array(state.observation_tensor(), dtype=np.float32)
-                obs_reshaped = np.reshape(observation, game.observation_tensor_shape())
-                obs_batch = np.expand_dims(obs_reshaped, 0)
+                obs_batch = observation.reshape(1, *obs_shape)
                 
                 try:
                     # Get policy and value from their separate, dedicated models
                     policy_pred = policy_model(obs_batch, training=False)
                     value_pred = value_model(obs_batch, training=False)
                     
-                    log(LogLevel.INFO, f"  Neural network value prediction: {value_pred[0].numpy()}")
+                    move_log.append(f"  Neural network value prediction: {value_pred[0].numpy()}")
                     
-                    # START DEBUG =================================================================================
-                    # Show policy values for legal actions
                     policy_flat = policy_pred[0].numpy()
+                    legal_np = np.asarray(legal_actions)
+                    scores = policy_flat[legal_np]
 
-                    # Categorize actions by type and find the best of each
-                    action_categories = {
-                        'income': [],
-                        'mancala': [],
-                        'upgrade': [],
-                        'pass': [],
-                        'other': []
-                    }
-
-                    # Categorize all legal actions
+                    # Categorize legal actions by type. An action id always decodes to the
+                    # same move type, so each id's category is looked up only once.
                     for action in legal_actions:
-                        if 0 <= action < len(policy_flat):
+                        if action not in action_categories:
                             action_str = state.action_to_string(player, action).lower()
-                            policy_val = policy_flat[action]
-                            
-                            if "income" in action_str:
-                                action_categories['income'].append((action, policy_val, action_str))
-                            elif "mancala" in action_str:
-                                action_categories['mancala'].append((action, policy_val, action_str))
-                            elif "upgrade" in action_str:
-                                action_categories['upgrade'].append((action, policy_val, action_str))
-                            elif "pass" in action_str:
-                                action_categories['pass'].append((action, policy_val, action_str))
-                            else:
-                                action_categories['other'].append((action, policy_val, action_str))
+                            action_categories[action] = next(
+                                (i for i, name in enumerate(DEBUG_ACTION_CATEGORIES[:-1]) if name in action_str),
+                                len(DEBUG_ACTION_CATEGORIES) - 1)
+                    categories = np.fromiter((action_categories[a] for a in legal_actions), dtype=np.int8, count=len(legal_actions))
 
                     # Find and log the top action for each category
-                    top_by_category = {}
-                    for category, actions in action_categories.items():
-                        if actions:
-                            # Sort by policy value (descending) and take the top one
-                            top_action = max(actions, key=lambda x: x[1])
-                            top_by_category[category] = f"{category.upper()}: {top_action[2]}: {top_action[1]:.4f}"
+                    top_by_category = []
+                    for i, category in enumerate(DEBUG_ACTION_CATEGORIES):
+                        mask = categories == i
+                        if mask.any():
+                            best = legal_np[mask][np.argmax(scores[mask])]
+                            best_str = state.action_to_string(player, best).lower()
+                            top_by_category.append(f"{category.upper()}: {best_str}: {policy_flat[best]:.4f}")
 
                     if top_by_category:
-                        log(LogLevel.INFO, f"   Top policy by type: {list(top_by_category.values())}")
+                        move_log.append(f"   Top policy by type: {top_by_category}")
 
                     # Also show overall top 5 actions across all types
-                    all_legal_with_policy = [(action, policy_flat[action], state.action_to_string(player, action)) 
-                                            for action in legal_actions if 0 <= action < len(policy_flat)]
-                    top_5_overall = sorted(all_legal_with_policy, key=lambda x: x[1], reverse=True)[:5]
-                    top_5_strings = [f"{action_str}: {policy_val:.4f}" for _, policy_val, action_str in top_5_overall]
-                    log(LogLevel.INFO, f"   Top 5 overall policies: {top_5_strings}")
-
-                    # Special check for income actions (keep your existing logic)
-                    income_actions = [a for a in legal_actions if "income" in state.action_to_string(player, a).lower()]
-                    if income_actions:
-                        income_action = income_actions[0]
-                        income_policy = policy_flat[income_action] if income_action < len(policy_flat) else 0
-                        log(LogLevel.INFO, f"   Income action {income_action} policy value: {income_policy:.4f}")
+                    k = min(5, len(legal_np))
+                    top_5 = legal_np[np.argpartition(-scores, k - 1)[:k]]
+                    top_5 = top_5[np.argsort(-policy_flat[top_5])]
+                    top_5_strings = [f"{state.action_to_string(player, a)}: {policy_flat[a]:.4f}" for a in top_5]
+                    move_log.append(f"   Top 5 overall policies: {top_5_strings}")
+
+                    # Special check for income actions
+                    income_mask = categories == 0
+                    if income_mask.any():
+                        income_action = legal_np[income_mask][0]
+                        move_log.append(f"   Income action {income_action} policy value: {policy_flat[income_action]:.4f}")
+                except Exception as e:
+                    log(LogLevel.ERROR, f"  Neural network prediction failed: {e}")
             #===============================================================
             # END DEBUG to see what choices the bot has
             #===============================================================
-                        
-                except Exception as e:
-                    log(LogLevel.ERROR, f"  Neural network prediction failed: {e}")
             
-            action_map = {action: i for i, action in enumerate(legal_actions)}
-
-            visit_counts = np.zeros(len(legal_actions))
-            for child in root.children:
-                if child.action in action_map:
-                    visit_counts[action_map[child.action]] = child.explore_count
-
-            if np.sum(visit_counts) > 0:
-                powered_policy = np.power(visit_counts, 1.0 / temperature)
-                mcts_policy_compact = powered_policy / np.sum(powered_policy)
-                # Choose an action from the *compact* index space
-                chosen_compact_index = np.random.choice(len(legal_actions), p=mcts_policy_compact)
-                action = legal_actions[chosen_compact_index]
-            else:
+            # One Python pass over the root's children; the numeric work is JIT-compiled.
+            # For the replay buffer, the policy over the FULL action space is written
+            # straight into this move's trajectory row.
+            num_children = len(root.children)
+            child_actions = np.fromiter((child.action for child in root.children), dtype=np.int64, count=num_children)
+            child_visits = np.fromiter((child.explore_count for child in root.children), dtype=np.float64, count=num_children)
+            mcts_policy_full = trajectory.policies[move_count]
+            action = int(mcts_visit_policy(child_actions, child_visits, np.asarray(legal_actions, dtype=np.int64),
+                                           temperature, np.random.random(), mcts_policy_full))
+            if action < 0:
                 action = random.choice(legal_actions)
 
             #===============================================================
             # DEBUG to see what choices the bot has
             #===============================================================
-            if move_count < 200 and player >= 0:
+            if LOG_DEBUG_MOVES and move_count < 200 and player >= 0:
                 chosen_action_str = state.action_to_string(player, action)
-                log(LogLevel.INFO, f"  MCTS chose: {chosen_action_str} (action {action})")
+                move_log.append(f"  MCTS chose: {chosen_action_str} (action {action})")
                 
                 # Show MCTS visit counts for top actions
                 if hasattr(root, 'children') and len(root.children) > 0:
@@ -372,34 +536,30 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
                     for act, count in visit_counts[:3]:
                         act_str = state.action_to_string(player, act)
                         top_visits.append(f"{act_str}: {count} visits")
-                    log(LogLevel.INFO, f"  MCTS top visits: {top_visits}")
+                    move_log.append(f"  MCTS top visits: {top_visits}")
             #===============================================================
             # DEBUG to see what choices the bot has
             #===============================================================
 
-            # For the replay buffer, we need the policy over the FULL action space
-            mcts_policy_full = np.zeros(game.num_distinct_actions())
-            for child in root.children:
-                 if 0 <= child.action < game.num_distinct_actions():
-                    mcts_policy_full[child.action] = child.explore_count
-            if np.sum(mcts_policy_full) > 0:
-                mcts_policy_full /= np.sum(mcts_policy_full)
-            else: # Fallback for states with no visits (should be rare)
-                prob = 1.0 / len(legal_actions)
-                for act in legal_actions:
-                    mcts_policy_full[act] = prob
-            
-            if action != pyspiel.INVALID_ACTION:
+            if LOG_MOVES and action != pyspiel.INVALID_ACTION:
                 action_str = state.action_to_string(player, action)
-                log(LogLevel.INFO, f"Actor {actor_id}, Game {episode_num}, Move {move_count}: Player {player} plays '{action_str}'")
+                move_log.append(f"Actor {actor_id}, Game {episode_num}, Move {move_count}: Player {player} plays '{action_str}'")
 
             if action == pyspiel.INVALID_ACTION: break
 
-            reward_vector = state.rewards() # Get intermediate rewards BEFORE applying the next action
+            # Get intermediate rewards BEFORE applying the next action (written in place, zero if none)
+            reward_row = trajectory.rewards[move_count]
+            reward_row.fill(0)
+            mali_ba_state.rewards_into(reward_row)
+            trajectory.players[move_count] = player
             state.apply_action(action)
-            episode_trajectory.append((observation, player, mcts_policy_full, reward_vector))
             move_count += 1
 
+        trajectory.length = move_count
+        if move_log:
+            log(LogLevel.INFO, "\n".join(move_log))
+            move_log.clear()
+
         returns = state.returns()
         if state.is_terminal():
             mali_ba_state_terminal = pyspiel.mali_ba.downcast_state(state)
@@ -416,16 +576,9 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
             # --- BEGIN intermediate rewards calculation ---
             try:
                 # Calculate the sum of intermediate rewards for each player from the trajectory
-                num_players = game.num_players()
-                total_intermediate_rewards = [0.0] * num_players
-                non_zero_reward_steps = 0
-
-                # The trajectory is a list of (observation, player, policy, reward_vector)
-                for _, _, _, reward_vector in episode_trajectory:
-                    if any(r != 0 for r in reward_vector):
-                        non_zero_reward_steps += 1
-                    for i in range(num_players):
-                        total_intermediate_rewards[i] += reward_vector[i]
+                rewards = trajectory.arrays()[3]
+                total_intermediate_rewards = rewards.sum(axis=0)
+                non_zero_reward_steps = int(np.count_nonzero(rewards.any(axis=1)))
                 
                 # Format the rewards for readable logging
                 formatted_rewards = [f"{r:.4f}" for r in total_intermediate_rewards]
@@ -442,11 +595,18 @@ def actor_process(actor_id, game_params, args, job_queue, result_queue, games_pe
                 f"Rewarded Steps: {non_zero_reward_steps}"
                 )
             
-        result_queue.put((episode_trajectory, returns))
-
+        # Turn the slot's reward rows into value targets here, on the actor's core,
+        # so the learner only has to forward the slot to the trainer
+        discount_returns_inplace(trajectory.arrays()[3], np.asarray(returns, dtype=np.float32), GAMMA)
+        slot_owners[slot_id] = -1  # Owned by the learner from here on
+        result_queue.put((slot_id, move_count, returns))
+
+    policy_weights_shm.close()
+    value_weights_shm.close()
+    trajectory_slots.close()
     log(LogLevel.INFO, f"Actor {actor_id} completed its quota of {games_per_actor} games and is terminating.")
 
-def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue, games_per_actor):
+def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue, games_per_actor, shared_weights=None, shared_trajectories=None, cpu_core=None):
     """
     An actor process that plays games using the built-in C++ heuristic.
     It generates trajectories with one-hot policies to bootstrap the initial model.
@@ -458,11 +618,13 @@ def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue
     from pyspiel import mali_ba
     from pyspiel.mali_ba import log, LogLevel
     import tensorflow as tf
+    from mali_ba.training_utils import SharedTrajectorySlots, discount_returns_inplace, quantize_observation
 
     # Ensure this actor runs on CPU to leave GPU for the trainer
     os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
     tf.config.set_visible_devices([], 'GPU')
-    log(LogLevel.INFO, f"Heuristic Actor {actor_id} started (CPU-only).")
+    pin_actor_to_core(cpu_core, tf)
+    log(LogLevel.INFO, f"Heuristic Actor {actor_id} started (CPU-only, core {cpu_core}).")
 
     # --- Create ONE game object for the lifetime of the actor ---
     log(LogLevel.INFO, f"Heuristic Actor {actor_id}: Initializing its game instance.")
@@ -470,13 +632,19 @@ def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue
     # Get the max game length
     max_game_length = game.get_max_game_length()
     log(LogLevel.INFO, f"Using max game length: {max_game_length}")
+
+    # Trajectories are written straight into the learner's shared-memory slots. The C++
+    # state fills one float32 scratch row, which is stored in the slot as uint8.
+    free_slot_queue, slots_spec, slot_owners = shared_trajectories
+    trajectory_slots = SharedTrajectorySlots.attach(slots_spec)
+    observation = np.empty(game.observation_tensor_size(), dtype=np.float32)
     
     for _ in range(args.games_per_actor):
         job = job_queue.get()
         if job is None:
             break
 
-        episode_num, _, game_rng_seed = job
+        episode_num, game_rng_seed = job
 
         # Seed Python's random for deterministic choices if needed
         random.seed(game_rng_seed)
@@ -493,9 +661,11 @@ def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue
 
         # --- Play the full game to generate a trajectory ---
         
-        # This list will store tuples of (observation, player, one_hot_policy)
-        # The final game outcome will be added later.
-        temp_trajectory = []
+        # `trajectory` is a free shared-memory slot storing (observation, player,
+        # policy, reward) rows per move. The final game outcome will be added later.
+        slot_id = free_slot_queue.get()
+        slot_owners[slot_id] = actor_id
+        trajectory = trajectory_slots.slots[slot_id]
 
         # Handle initial chance and token placement phases randomly
         if state.is_chance_node():
@@ -514,8 +684,12 @@ def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue
 
         # Main heuristic-driven play loop
         while not state.is_terminal():
+            if move_count >= trajectory.max_length:
+                log(LogLevel.WARN, f"Heuristic Actor {actor_id}, Game {episode_num}: Trajectory reached {trajectory.max_length} moves. Stopping.")
+                break
             player = state.current_player()
-            observation = np.array(state.observation_tensor(), dtype=np.float32)
+            mali_ba_state.observation_tensor_into(observation)
+            quantize_observation(observation, trajectory.observations[move_count])
             # # DEBUG ======================================================================
             # log(LogLevel.INFO, f"Raw observation shape: {observation.shape}")
             # log(LogLevel.INFO, f"Raw observation range: min={np.min(observation)}, max={np.max(observation)}")
@@ -531,36 +705,38 @@ def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue
             # Get the weights for ALL legal actions
             action_weights_map = mali_ba_state.get_heuristic_action_weights()
             
-            # Create the policy target vector
-            policy_target = np.zeros(game.num_distinct_actions(), dtype=np.float32)
+            # Create the policy target vector in this move's trajectory row
+            policy_target = trajectory.policies[move_count]
+            policy_target.fill(0)
             
-            total_weight = sum(action_weights_map.values())
+            num_weighted = len(action_weights_map)
+            weighted_actions = np.fromiter(action_weights_map.keys(), dtype=np.int64, count=num_weighted)
+            weights = np.fromiter(action_weights_map.values(), dtype=np.float32, count=num_weighted)
+            total_weight = weights.sum()
             
             if total_weight > 0:
-                for act, weight in action_weights_map.items():
-                    policy_target[act] = weight / total_weight # Normalize to a probability distribution
+                policy_target[weighted_actions] = weights / total_weight # Normalize to a probability distribution
             else:
                 # Fallback for states where all weights are zero (should be rare)
                 legal_actions = state.legal_actions()
                 if legal_actions:
-                    prob = 1.0 / len(legal_actions)
-                    for act in legal_actions:
-                        policy_target[act] = prob
+                    policy_target[legal_actions] = 1.0 / len(legal_actions)
 
             # Store the observation and policy for the current state (S_t)
             # Then, apply the action to transition to the next state (S_{t+1})
             state.apply_action(action)
             
             # Now get the immediate reward (R_{t+1}) received for that transition
-            reward_vector = state.rewards()
-
-            # Store the complete 4-element tuple for this step
-            temp_trajectory.append((observation, player, policy_target, reward_vector))
+            reward_row = trajectory.rewards[move_count]
+            reward_row.fill(0)
+            mali_ba_state.rewards_into(reward_row)  # Written in place only if non-zero
+            trajectory.players[move_count] = player
 
             move_count += 1
             # END Main heuristic-driven play loop - while not state.is_terminal():
 
         # Game is over, get the final returns
+        trajectory.length = move_count
         returns = state.returns()
 
         # # DEBUG Check action diversity in this game
@@ -583,40 +759,51 @@ def heuristic_actor_process(actor_id, game_params, args, job_queue, result_queue
             f"Heuristic Actor {actor_id}, Game {episode_num}: FINISHED in {move_count} moves. "
             f"Final Returns: {returns}")
 
-        # The result queue expects a trajectory and the returns.
-        # This format is identical to what the MCTS actor produces.
-        result_queue.put((temp_trajectory, returns))
+        # The result queue expects the trajectory slot (reward rows already turned into
+        # value targets), its length and the returns, exactly as the MCTS actor sends them.
+        discount_returns_inplace(trajectory.arrays()[3], np.asarray(returns, dtype=np.float32), GAMMA)
+        slot_owners[slot_id] = -1  # Owned by the learner from here on
+        result_queue.put((slot_id, move_count, returns))
 
+    trajectory_slots.close()
     log(LogLevel.INFO, f"Heuristic Actor {actor_id} completed its quota and is terminating.")
 
 
-def spawn_actor(actor_id, initial_game_params, args, job_queue, result_queue, actor_pool, actor_function):
+def spawn_actor(actor_id, initial_game_params, args, job_queue, result_queue, actor_pool, actor_function, shared_weights, shared_trajectories, actor_cores):
     """
     Creates, starts, and tracks a new actor process using the specified actor function.
+    `shared_weights` is (lock, version, policy_spec, value_spec) for the trainer's shared-memory weights.
+    `shared_trajectories` is (free_slot_queue, slots_spec, slot_owners) for the learner's
+    trajectory slots; slot_owners[slot_id] is the ID of the actor writing into it, or -1.
+    Actors are pinned round-robin to `actor_cores` by ID.
     """
+    cpu_core = actor_cores[actor_id % len(actor_cores)]
     p = mp.Process(target=actor_function, args=(
-        actor_id, initial_game_params, args, job_queue, result_queue, args.games_per_actor))
+        actor_id, initial_game_params, args, job_queue, result_queue, args.games_per_actor, shared_weights, shared_trajectories, cpu_core))
     p.start()
     actor_pool[p] = actor_id # Associates the process object with its ID
     print(f"Main: Spawned new actor (type: {actor_function.__name__}) with ID {actor_id}.")
 
 def log_game_outcome_debug(total_games_processed, returns, game_length, max_game_length):
+    """Debug logging for game outcomes."""
+    import numpy as np
     try:
         from pyspiel.mali_ba import log, LogLevel
     except ImportError:
         class LogLevel: INFO, WARN = 1, 2
         def log(level, msg): print(msg)
 
-    """Debug logging for game outcomes."""
     if total_games_processed % 50 == 0 or total_games_processed <= 10:
         length_penalty_ratio = game_length / max_game_length
         
-        if any(r > 0 for r in returns):  # Someone won
-            winner = returns.index(max(returns))
+        returns_np = np.asarray(returns)
+        best = int(returns_np.argmax())
+        if returns_np[best] > 0:  # Someone won
+            winner = best
             #discounted_win = 1.0 - (length_penalty_ratio ** 1.5)
             log(LogLevel.INFO, f"  DECISIVE GAME: Player {winner} won in {game_length} moves")
-            log(LogLevel.INFO, f"    Return: {returns[winner]:.3f} ")
-        elif any(r == 0 for r in returns):  # Draw
+            log(LogLevel.INFO, f"    Return: {returns_np[winner]:.3f} ")
+        elif (returns_np == 0).any():  # Draw
             log(LogLevel.INFO, f"  DRAW GAME: {game_length} moves, all players get penalty")
         else:
             log(LogLevel.INFO, f"  UNUSUAL GAME: Returns {returns}")
@@ -630,7 +817,7 @@ def main(args):
         class LogLevel: INFO, WARN = 1, 2
         def log(level, msg): print(msg)
     import queue
-    from training_utils import get_training_parameters_from_game
+    from training_utils import get_training_parameters_from_game, SharedTrajectorySlots
 
     log(LogLevel.INFO, "--- Starting Mali-Ba MULTIPROCESS AI Training Script ---")
 
@@ -643,6 +830,16 @@ def main(args):
     # DEBUG: Not sure if this is needed or if it's all taken care of in C++
     temp_game = pyspiel.load_game(args.game_name, initial_game_params)
     training_params = get_training_parameters_from_game(temp_game)
+    # Trajectory slot pool: actors write games into shared memory and send only the slot id
+    trajectory_slots = SharedTrajectorySlots(
+        args.num_actors * TRAJECTORY_SLOTS_PER_ACTOR, temp_game.get_max_game_length(),
+        temp_game.observation_tensor_size(), temp_game.num_distinct_actions(), temp_game.num_players())
+    free_slot_queue = mp.Queue()
+    for slot_id in range(len(trajectory_slots.slots)):
+        free_slot_queue.put(slot_id)
+    # Which actor holds each slot mid-game, so a dead actor's slots can be returned
+    slot_owners = mp.Array('i', [-1] * len(trajectory_slots.slots), lock=False)
+    shared_trajectories = (free_slot_queue, trajectory_slots.spec(), slot_owners)
     del temp_game
     DRAW_PENALTY = training_params['draw_penalty']
     MAX_MOVES_PENALTY = training_params['max_moves_penalty']
@@ -656,35 +853,43 @@ def main(args):
     # log(LogLevel.INFO, f"  Quick win threshold: {QUICK_WIN_THRESHOLD}")
 
     # The job queue should have enough for all actors to have a backup job.
-    max_jobs = args.num_actors * 3
+    # Its maxsize is what keeps it topped up: the learner fills it until queue.Full.
+    max_jobs = args.num_actors * 2
     job_queue = mp.Queue(maxsize=max_jobs)
 
     # The result queue should be small; we want to process results quickly.
+    # Actors only send (slot_id, length, returns); faster_fifo avoids mp.Queue's shared write lock.
     max_results = args.num_actors 
-    result_queue = mp.Queue(maxsize=max_results)
+    result_queue = make_batch_queue(max_results, 256)
 
-    # The replay buffer queue is the biggest memory consumer.
-    # Limit it to a few batches worth of experiences.
-    # batch_size * num_moves_per_game * num_games
-    # A fixed large number is simpler. Let's allow 20 batches.
-    max_replay_items = args.batch_size * 50
-    replay_buffer_queue = mp.Queue(maxsize=max_replay_items)
+    # The replay buffer queue only carries (slot_id, length) pairs; the games stay in
+    # shared memory, so it never needs more room than there are slots.
+    replay_buffer_queue = make_batch_queue(len(trajectory_slots.slots) + 1, 64)
 
     weights_queue = mp.Queue()
     stats_queue = mp.Queue()
+    # Guards the shared-memory weights so actors never read a half-written update
+    weights_lock = mp.Lock()
+    # Version of the weights currently in shared memory; written under weights_lock
+    shared_weights_version = mp.Value('i', 0, lock=False)
 
     trainer = mp.Process(target=trainer_process, args=(
-        args, initial_game_params, replay_buffer_queue, weights_queue, stats_queue))
+        args, initial_game_params, replay_buffer_queue, weights_queue, stats_queue, weights_lock, shared_weights_version, shared_trajectories))
     trainer.start()
     log(LogLevel.INFO, "Launched trainer process.")
 
     # --- 2. Learner State Init (Same) ---
     actor_pool = {}
+    actor_cores = get_actor_cores()
     next_actor_id = 0
     total_games_processed = 0
     jobs_dispatched = 0
+    # Per-game learner lines are formatted and written off the result loop
+    log_async, stop_log_writer = start_log_writer(log)
+    last_queue_sizes_logged_at = None
+    games_sent_to_trainer = 0
     start_time = time.time()
-    last_weights_update_time = time.time()
+    last_actor_health_check_time = 0.0
     
     if args.random_seed is None:
         master_seed = int(time.time() * 1000) % (2**32 - 1)
@@ -694,138 +899,138 @@ def main(args):
     import numpy as np
     seed_generator = np.random.RandomState(master_seed)
     log(LogLevel.INFO, f"Master seed generator initialized with seed: {master_seed}")
+    # Draw every episode's seed up front in one call
+    job_seeds = seed_generator.randint(0, 2**31 - 1, size=args.num_episodes)
 
-    log(LogLevel.INFO, "Learner waiting for initial weights from trainer...")
-    current_weights = weights_queue.get()
-    log(LogLevel.INFO, "Learner received initial weights.")
+    # Filled in from the trainer's first weights_queue message when the first MCTS actor is spawned
+    shared_weights = None
 
     # --- 3. UNIFIED Main Learner Loop ---
     bootstrap_transition_logged = False
     while total_games_processed < args.num_episodes:
 
 
-        if total_games_processed % 10 == 0:
-            log(LogLevel.DEBUG, f"Queue sizes - Jobs: {job_queue.qsize()}, "
-                            f"Results: {result_queue.qsize()}, "
-                            f"Replay: {replay_buffer_queue.qsize()}")
+        # Once per 10 games, not on every idle pass of the loop
+        if LOG_DEBUG_ENABLED and total_games_processed % 10 == 0 and total_games_processed != last_queue_sizes_logged_at:
+            last_queue_sizes_logged_at = total_games_processed
+            # Learner-side counters rather than qsize() (a syscall each, and unimplemented on macOS)
+            log_async(LogLevel.DEBUG, "Queue sizes - Jobs in flight: {}, Games sent to trainer: {}",
+                      jobs_dispatched - total_games_processed, games_sent_to_trainer)
 
         # --- A. Actor & Job Management ---
         
-        # Determine which actor function to use for any NEW spawns
-        if total_games_processed < args.bootstrap_episodes:
-            current_actor_function = heuristic_actor_process
-        else:
-            if not bootstrap_transition_logged and args.bootstrap_episodes > 0:
-                log(LogLevel.INFO, f"--- Bootstrap phase complete. New actors will be MCTS type. ---")
-                bootstrap_transition_logged = True
-            current_actor_function = actor_process
-            
         # --- Find, remove, and immediately replace dead actors ---
-        dead_actors = [p for p in actor_pool if not p.is_alive()]
-        if dead_actors:
-            log(LogLevel.INFO, f"Found {len(dead_actors)} dead actor(s). Respawning...")
+        dead_actors = []
+        if time.time() - last_actor_health_check_time > ACTOR_HEALTH_CHECK_INTERVAL_SECONDS:
+            dead_actors = [p for p in actor_pool if not p.is_alive()]
+            last_actor_health_check_time = time.time()
+        # Everything below only matters when an actor has to be (re)spawned
+        if dead_actors or len(actor_pool) < args.num_actors:
+            # Determine which actor function to use for the NEW spawns
+            if total_games_processed < args.bootstrap_episodes:
+                current_actor_function = heuristic_actor_process
+            else:
+                if not bootstrap_transition_logged and args.bootstrap_episodes > 0:
+                    log(LogLevel.INFO, f"--- Bootstrap phase complete. New actors will be MCTS type. ---")
+                    bootstrap_transition_logged = True
+                current_actor_function = actor_process
+
+            # Heuristic bootstrap actors never read the weights, so they start right away;
+            # only MCTS actors wait for the trainer to publish its shared-memory layout.
+            if shared_weights is None and current_actor_function is actor_process:
+                log(LogLevel.INFO, "Learner waiting for initial weights from trainer...")
+                policy_spec, value_spec = weights_queue.get()
+                shared_weights = (weights_lock, shared_weights_version, policy_spec, value_spec)
+                log(LogLevel.INFO, "Learner received shared-memory weight layout.")
+            
+            if dead_actors:
+                log(LogLevel.INFO, f"Found {len(dead_actors)} dead actor(s). Respawning...")
             
-        for p in dead_actors:
-            actor_crashed_id = actor_pool[p]
-            log(LogLevel.WARN, f"Actor ID {actor_crashed_id} terminated. Spawning replacement of type {current_actor_function.__name__}.")
+            for p in dead_actors:
+                actor_crashed_id = actor_pool[p]
+                log(LogLevel.WARN, f"Actor ID {actor_crashed_id} terminated. Spawning replacement of type {current_actor_function.__name__}.")
             
-            # Remove the dead process from the pool
-            del actor_pool[p]
+                # Remove the dead process from the pool
+                del actor_pool[p]
+
+                # Return any slot it took but never handed back
+                for slot_id, owner in enumerate(slot_owners):
+                    if owner == actor_crashed_id:
+                        slot_owners[slot_id] = -1
+                        free_slot_queue.put(slot_id)
+                        log(LogLevel.WARN, f"Reclaimed trajectory slot {slot_id} from actor ID {actor_crashed_id}.")
             
-            # Immediately spawn its replacement
-            spawn_actor(next_actor_id, initial_game_params, args, job_queue, result_queue, actor_pool, current_actor_function)
-            next_actor_id += 1
+                # Immediately spawn its replacement
+                spawn_actor(next_actor_id, initial_game_params, args, job_queue, result_queue, actor_pool, current_actor_function, shared_weights, shared_trajectories, actor_cores)
+                next_actor_id += 1
             
-        # This separate loop is now only necessary for the initial startup,
-        # but it's harmless to keep it for ensuring the pool is always full.
-        while len(actor_pool) < args.num_actors:
-            log(LogLevel.INFO, f"Actor pool below target ({len(actor_pool)}/{args.num_actors}). Spawning new actor.")
-            spawn_actor(next_actor_id, initial_game_params, args, job_queue, result_queue, actor_pool, current_actor_function)
-            next_actor_id += 1
+            # This separate loop is now only necessary for the initial startup,
+            # but it's harmless to keep it for ensuring the pool is always full.
+            while len(actor_pool) < args.num_actors:
+                log(LogLevel.INFO, f"Actor pool below target ({len(actor_pool)}/{args.num_actors}). Spawning new actor.")
+                spawn_actor(next_actor_id, initial_game_params, args, job_queue, result_queue, actor_pool, current_actor_function, shared_weights, shared_trajectories, actor_cores)
+                next_actor_id += 1
             
         # --- Maintain a healthy job queue size ---
-        # This logic remains the same and is correct.
-        target_job_queue_size = args.num_actors * 2
-        while job_queue.qsize() < target_job_queue_size and jobs_dispatched < args.num_episodes:
-            unique_seed = seed_generator.randint(0, 2**31 - 1)
-            job_queue.put((jobs_dispatched, current_weights, unique_seed)) # This passes the tuple
+        # Top up until the bounded queue pushes back, instead of polling the racy qsize()
+        while jobs_dispatched < args.num_episodes:
+            try:
+                job_queue.put_nowait((jobs_dispatched, int(job_seeds[jobs_dispatched]))) # Weights themselves are in shared memory
+            except queue.Full:
+                break
             jobs_dispatched += 1
 
         # --- B. Try to process a result ---
+        results = []
+        slots_released = 0  # Leading results whose slots went to the trainer or back to the pool
         try:
-            trajectory, returns = result_queue.get(timeout=1.0)
-            
-            # Process the game result
-            total_games_processed += 1
-            phase_label = "Bootstrap" if total_games_processed <= args.bootstrap_episodes else "MCTS"
-            log(LogLevel.INFO, f"LEARNER ({phase_label}) RECEIVED GAME #{total_games_processed}/{args.num_episodes}. "
-                            f"Length: {len(trajectory)} moves. Returns: {returns}")
-
-            GAMMA = 0.99  # Discount factor. Rewards further in the future are worth slightly less.
-
-            # The 'returns' variable from the C++ state is the final terminal outcome.
-            final_terminal_returns = returns 
-            
-            # This will store (obs, player, policy, calculated_value_vector) for each step.
-            trajectory_with_values = []
-            
-            # We iterate backwards from the end of the game.
-            # The value of the last state is just the final game outcome.
-            next_state_discounted_returns = final_terminal_returns
-
-            for i in range(len(trajectory) - 1, -1, -1):
-                observation, player, policy_target, immediate_reward_vector = trajectory[i]
-                
-                # The value of a state is: (the immediate reward you get) + gamma * (the value of the state you land in).
-                # Since we are iterating backwards, 'next_state_discounted_returns' holds the value of the next state.
-                current_state_value_vector = [
-                    r + GAMMA * next_r for r, next_r in zip(immediate_reward_vector, next_state_discounted_returns)
-                ]
-                
-                # Add this step's data with the correctly calculated value to our list.
-                trajectory_with_values.append((observation, player, policy_target, current_state_value_vector))
-                
-                # The value we just calculated becomes the "next state value" for the previous step in the next iteration.
-                next_state_discounted_returns = current_state_value_vector
-
-            # The list is currently in reverse order, so let's put it back chronologically.
-            trajectory_with_values.reverse()
-
-            # Now, add the correctly calculated experiences to the replay buffer.
-            for observation, player, policy_target, value_target_vector in trajectory_with_values:
-                # The value target for the network is the full vector of expected returns for all players.
-                # The player_value is just one element of that vector, used for logging/debugging if needed.
-                player_value = value_target_vector[player]
-                value_data = (player, player_value, value_target_vector)
-                
-                if not replay_buffer_queue.full():
-                    replay_buffer_queue.put((observation, policy_target, value_data))
-                else:
-                    log(LogLevel.WARN, "Replay buffer queue is full during data insertion.")
-                    break
-
-            # Add detailed outcome logging
-            # log_game_outcome_debug(total_games_processed, discounted_returns, game_length, max_game_length)
-
-            # Debug logging for first few games
-            if total_games_processed <= 5:
-                log(LogLevel.INFO, f"Game {total_games_processed} debug:")
-                log(LogLevel.INFO, f"  Original returns: {returns}")
-                log(LogLevel.INFO, f"  returns: {returns}")
-                # log(LogLevel.INFO, f"  Length penalty ratio: {length_ratio:.3f}")
-
-            # # Create training experiences with proper value targets
-            # experiences_added = 0
-            # for observation, player, policy_target in trajectory:
-            #     player_value = returns[player]
-            #     value_data = (player, player_value, returns)
-            #     replay_buffer_queue.put((observation, policy_target, value_data))
-            #     experiences_added += 1
-
-            # # Debug log
-            # if total_games_processed <= 10:  # Only for first 10 games
-            #     log(LogLevel.INFO, f"MAIN: Added {experiences_added} experiences to queue. Queue size now: {replay_buffer_queue.qsize()}")
-
+            # Take up to one result per actor that is already waiting
+            results = get_batch(result_queue, args.num_actors, timeout=1.0)
+            finished_games = []
+            for slot_id, game_length, returns in results:
+                # The game stays in its shared-memory slot. The actor has already written the
+                # value targets over its reward rows (value = immediate reward + GAMMA * next
+                # value, from the final returns backwards), and the trainer returns the slot
+                # to the pool once it is copied.
+                total_games_processed += 1
+                if LOG_INFO_ENABLED:
+                    phase_label = "Bootstrap" if total_games_processed <= args.bootstrap_episodes else "MCTS"
+                    log_async(LogLevel.INFO, "LEARNER ({}) RECEIVED GAME #{}/{}. Length: {} moves. Returns: {}",
+                              phase_label, total_games_processed, args.num_episodes, game_length, returns)
+
+                # The slot goes to the trainer below
+                finished_games.append((slot_id, game_length))
+
+                # Add detailed outcome logging
+                # log_game_outcome_debug(total_games_processed, discounted_returns, game_length, max_game_length)
+
+                # Debug logging for first few games
+                if LOG_INFO_ENABLED and total_games_processed <= 5:
+                    log(LogLevel.INFO, f"Game {total_games_processed} debug:")
+                    log(LogLevel.INFO, f"  Original returns: {returns}")
+                    log(LogLevel.INFO, f"  returns: {returns}")
+                    # log(LogLevel.INFO, f"  Length penalty ratio: {length_ratio:.3f}")
+
+                # # Create training experiences with proper value targets
+                # experiences_added = 0
+                # for observation, player, policy_target in trajectory:
+                #     player_value = returns[player]
+                #     value_data = (player, player_value, returns)
+                #     replay_buffer_queue.put((observation, policy_target, value_data))
+                #     experiences_added += 1
+
+                # # Debug log
+                # if total_games_processed <= 10:  # Only for first 10 games
+                #     log(LogLevel.INFO, f"MAIN: Added {experiences_added} experiences to queue. Queue size now: {replay_buffer_queue.qsize()}")
+
+            # Hand every finished slot to the trainer in one put
+            accepted = put_batch(replay_buffer_queue, finished_games)
+            games_sent_to_trainer += accepted
+            if accepted < len(finished_games):
+                log(LogLevel.WARN, "Replay buffer queue is full during data insertion.")
+                for slot_id, _ in finished_games[accepted:]:
+                    free_slot_queue.put(slot_id)
+            slots_released = len(results)
 
         except queue.Empty:  # Only catch timeout exceptions
             #log(LogLevel.INFO, "...")
@@ -834,29 +1039,32 @@ def main(args):
             log(LogLevel.ERROR, f"Error processing game result: {e}")
             import traceback
             log(LogLevel.ERROR, f"Traceback: {traceback.format_exc()}")
-
-
-        # --- C. Weight & Stats Management (Periodic) ---
-        if time.time() - last_weights_update_time > WEIGHTS_UPDATE_INTERVAL_SECONDS:
-            latest_weights = None
-            while not weights_queue.empty():
-                try: latest_weights = weights_queue.get_nowait()
-                except: break
-            if latest_weights is not None:
-                current_weights = latest_weights
-                log(LogLevel.INFO, f"Learner updated to latest weights at game #{total_games_processed}. Distributing to {len(actor_pool)} actors.")
-
-            
-            while not stats_queue.empty():
+            # Results already taken off the queue still own their slots; don't leak them
+            for slot_id, _, _ in results[slots_released:]:
+                free_slot_queue.put(slot_id)
+
+
+        # --- C. Weight & Stats Management (as messages arrive) ---
+        # Until the layout message has been read, versions stay queued behind it
+        control_queues = [stats_queue, weights_queue] if shared_weights is not None else [stats_queue]
+        ready_queues = messages_waiting(control_queues)
+        if weights_queue in ready_queues:
+            latest_weights_version = get_latest_nowait(weights_queue)
+            if LOG_INFO_ENABLED and latest_weights_version is not None:
+                log(LogLevel.INFO, f"Trainer published weights version {latest_weights_version} by game #{total_games_processed}; "
+                                   f"{len(actor_pool)} actors pick it up at their next job.")
+
+        if stats_queue in ready_queues:
+            while True:
                 try:
                     stats = stats_queue.get_nowait()
-                    if "loss" in stats:
-                        log(LogLevel.INFO, f"Trainer reported loss: {stats['loss']:.4f} at game #{total_games_processed}")
-                except: break
-            
-            last_weights_update_time = time.time()
+                except queue.Empty:
+                    break
+                if LOG_INFO_ENABLED and "loss" in stats:
+                    log(LogLevel.INFO, f"Trainer reported loss: {stats['loss']:.4f} at game #{total_games_processed}")
 
     # --- 4. Final Shutdown (Same) ---
+    stop_log_writer()
     log(LogLevel.INFO, "All episodes processed. Sending shutdown signals...")
     # ... (shutdown code is correct) ...
     replay_buffer_queue.put(None)
@@ -879,6 +1087,7 @@ def main(args):
         p.join(timeout=60)
         if p.is_alive(): p.terminate()
 
+    trajectory_slots.close(unlink=True)
     log(LogLevel.INFO, "All processes terminated.")
     end_time = time.time()
     log(LogLevel.INFO, f"Total time: {end_time - start_time:.2f} seconds")
@@ -889,8 +1098,15 @@ def main(args):
 if __name__ == "__main__":
 
     try:
-        # Use the mp alias we defined at the top
-        mp.set_start_method('spawn', force=True) 
+        # Use the mp alias we defined at the top.
+        # Where available, children fork from a clean server process that has already
+        # imported numpy and pyspiel, so each actor skips re-importing them. Plain fork
+        # is avoided: the learner imports TensorFlow, which is not fork-safe.
+        if 'forkserver' in mp.get_all_start_methods():
+            mp.set_start_method('forkserver', force=True)
+            mp.set_forkserver_preload(['numpy', 'pyspiel'])
+        else:
+            mp.set_start_method('spawn', force=True)
     except RuntimeError:
         print("Note: multiprocessing start method already set.")
         pass
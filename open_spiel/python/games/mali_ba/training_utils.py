@@ -2,8 +2,21 @@ import tensorflow as tf
 from tensorflow.keras import layers, models
 import numpy as np
 import collections
+import json
+import mmap
 import os
 import random
+from multiprocessing import shared_memory
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional; without it the hot helpers below use their NumPy versions
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 # Import pyspiel here so all classes and functions in this file can see it.
 try:
     import pyspiel
@@ -14,6 +27,13 @@ except ImportError:
     pyspiel = None
 from pyspiel.mali_ba import log, LogLevel
 
+# XLA-compile the training step and MCTS inference (fuses each Conv2D/BN/ReLU block);
+# set MALI_BA_XLA=0 to fall back to plain graph mode
+XLA_JIT_COMPILE = os.environ.get("MALI_BA_XLA", "1") != "0"
+# Per-batch training diagnostics (reductions over the batch, .numpy() syncs) only at
+# MALI_BA_LOGLEVEL=DEBUG
+LOG_DEBUG_ENABLED = os.environ.get("MALI_BA_LOGLEVEL", "INFO").upper() == "DEBUG"
+
 
 # Extra functions
 def get_training_parameters_from_game(game):
@@ -74,32 +94,339 @@ def monitor_memory(func):
         return result
     return wrapper
 
-# A simple replay buffer
+@njit(cache=True, fastmath=True)
+def _mcts_visit_policy_numba(child_actions, child_visits, legal_actions, temperature, draw, policy_out):
+    """Turn MCTS root visit counts into a move and a full-action-space policy.
+
+    Fills `policy_out` with the normalized visit counts (uniform over legal actions
+    if nothing was visited) and returns the legal action sampled from
+    counts ** (1 / temperature) by inverting the CDF at `draw` in [0, 1).
+    Returns -1 if no legal action has any visits.
+    """
+    num_actions = policy_out.shape[0]
+    policy_out[:] = 0.0
+    total_visits = 0.0
+    for i in range(child_actions.shape[0]):
+        action = child_actions[i]
+        if 0 <= action < num_actions:
+            policy_out[action] = child_visits[i]
+            total_visits += child_visits[i]
+
+    inv_temperature = 1.0 / temperature
+    total_weight = 0.0
+    for i in range(legal_actions.shape[0]):
+        total_weight += policy_out[legal_actions[i]] ** inv_temperature
+    chosen = -1
+    if total_weight > 0.0:
+        target = draw * total_weight
+        cumulative = 0.0
+        for i in range(legal_actions.shape[0]):
+            weight = policy_out[legal_actions[i]] ** inv_temperature
+            if weight > 0.0:
+                chosen = legal_actions[i]  # Also covers target rounding up to the total
+                cumulative += weight
+                if cumulative > target:
+                    break
+
+    if total_visits > 0.0:
+        for a in range(num_actions):
+            policy_out[a] /= total_visits
+    else:
+        for i in range(legal_actions.shape[0]):
+            policy_out[legal_actions[i]] = 1.0 / legal_actions.shape[0]
+    return chosen
+
+def _mcts_visit_policy_numpy(child_actions, child_visits, legal_actions, temperature, draw, policy_out):
+    """Vectorized equivalent of _mcts_visit_policy_numba for when Numba is missing."""
+    num_actions = policy_out.shape[0]
+    policy_out[:] = 0.0
+    in_range = (child_actions >= 0) & (child_actions < num_actions)
+    policy_out[child_actions[in_range]] = child_visits[in_range]
+    total_visits = float(child_visits[in_range].sum())
+
+    weights = policy_out[legal_actions] ** (1.0 / temperature)
+    cumulative = np.cumsum(weights)
+    chosen = -1
+    if cumulative.shape[0] and cumulative[-1] > 0.0:
+        index = int(np.searchsorted(cumulative, draw * cumulative[-1], side="right"))
+        if index >= cumulative.shape[0]:
+            index = int(np.flatnonzero(weights)[-1])  # Target rounded up to the total
+        chosen = int(legal_actions[index])
+
+    if total_visits > 0.0:
+        policy_out /= total_visits
+    elif legal_actions.shape[0]:
+        policy_out[legal_actions] = 1.0 / legal_actions.shape[0]
+    return chosen
+
+mcts_visit_policy = _mcts_visit_policy_numba if NUMBA_AVAILABLE else _mcts_visit_policy_numpy
+
+@njit(cache=True)
+def _discount_returns_inplace_numba(rewards, final_returns, gamma):
+    """Turn a game's [T, num_players] per-step rewards into value targets, in place.
+
+    Walking backwards, row t becomes rewards[t] + gamma * row t+1, with the final
+    game outcome standing in for the row after the last step.
+    """
+    num_steps, num_players = rewards.shape
+    for p in range(num_players):
+        next_value = final_returns[p]
+        for t in range(num_steps - 1, -1, -1):
+            next_value = rewards[t, p] + gamma * next_value
+            rewards[t, p] = next_value
+
+def _discount_returns_inplace_numpy(rewards, final_returns, gamma):
+    """Vectorized equivalent of _discount_returns_inplace_numba for when Numba is missing.
+
+    Row t is sum_{k>=t} gamma^(k-t) * rewards[k] + gamma^(T-t) * final_returns, computed
+    for all players at once as a reverse cumulative sum of gamma^k-scaled rows.
+    """
+    num_steps = rewards.shape[0]
+    if num_steps == 0 or gamma == 0.0:
+        return  # With no discounting carried over, the targets are the raw rewards
+    discounts = gamma ** np.arange(num_steps, dtype=np.float64)[:, None]
+    tail = np.cumsum((rewards * discounts)[::-1], axis=0)[::-1]
+    tail += (gamma ** num_steps) * np.asarray(final_returns, dtype=np.float64)
+    rewards[:] = tail / discounts
+
+discount_returns_inplace = (_discount_returns_inplace_numba if NUMBA_AVAILABLE
+                            else _discount_returns_inplace_numpy)
+
+# Raw weight sidecars: next to each Keras .weights.h5 file, save_model also writes the
+# weights as one flat .weights.bin plus a .weights.json index of (shape, dtype, offset).
+# load_model maps the .bin file and assigns straight from the page cache.
+def _raw_weights_paths(h5_path):
+    base = h5_path[:-len(".h5")] if h5_path.endswith(".h5") else h5_path
+    return base + ".bin", base + ".json"
+
+def _save_raw_weights(model, h5_path):
+    bin_path, index_path = _raw_weights_paths(h5_path)
+    index = []
+    offset = 0
+    with open(bin_path, "wb") as f:
+        for weight in model.get_weights():
+            weight = np.ascontiguousarray(weight)
+            weight.tofile(f)
+            index.append({"shape": list(weight.shape), "dtype": weight.dtype.str, "offset": offset})
+            offset += weight.nbytes
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+
+def _load_raw_weights(model, h5_path):
+    """Assign `model`'s weights from an mmap of its raw sidecar.
+
+    Returns False (leaving the model untouched) if the sidecar is missing, older
+    than the .h5 file, or does not match the model's variables.
+    """
+    bin_path, index_path = _raw_weights_paths(h5_path)
+    if not (os.path.exists(bin_path) and os.path.exists(index_path)):
+        return False
+    if os.path.exists(h5_path) and os.path.getmtime(bin_path) < os.path.getmtime(h5_path):
+        return False
+    with open(index_path) as f:
+        index = json.load(f)
+    variables = model.weights
+    if len(index) != len(variables) or any(
+            tuple(entry["shape"]) != tuple(var.shape) for entry, var in zip(index, variables)):
+        return False
+    with open(bin_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for entry, var in zip(index, variables):
+            count = int(np.prod(entry["shape"]))
+            var.assign(np.frombuffer(mm, dtype=entry["dtype"], count=count,
+                                     offset=entry["offset"]).reshape(entry["shape"]))
+    return True
+
+# Observation planes are 0/1 flags and small non-negative counts, so trajectories and
+# the replay buffer store them as uint8 (4x smaller than float32). The networks still
+# take float32: observations are cast back once per batch.
+OBSERVATION_DTYPE = np.uint8
+
+def quantize_observation(observation, out):
+    """Store a float32 observation into a uint8 row, saturating counts at 255."""
+    np.copyto(out, np.minimum(observation, 255.0), casting='unsafe')
+
+# Replay buffer as a fixed-size ring of preallocated NumPy arrays (one per field).
+# Once full, new experiences overwrite the oldest, so it never needs pruning.
 class ReplayBuffer:
-    def __init__(self, buffer_size):
-        self.buffer = collections.deque(maxlen=buffer_size)
+    def __init__(self, buffer_size, observation_size, num_actions, num_players):
+        self.buffer_size = buffer_size
+        self.observations = np.empty((buffer_size, observation_size), dtype=OBSERVATION_DTYPE)
+        self.policies = np.empty((buffer_size, num_actions), dtype=np.float32)
+        self.players = np.empty(buffer_size, dtype=np.int8)
+        self.values = np.zeros((buffer_size, num_players), dtype=np.float32)
+        self._head = 0  # Next slot to write
+        self._size = 0
 
     def add(self, experience):
-        self.buffer.append(experience)
+        """Add an (observation, policy_target, (player, player_value, value_vector)) experience."""
+        observation, policy_target, (player, _, value_vector) = experience
+        i = self._head
+        self.observations[i] = observation
+        self.policies[i] = policy_target
+        self.players[i] = player
+        n = min(len(value_vector), self.values.shape[1])
+        self.values[i, :n] = value_vector[:n]
+        self.values[i, n:] = 0.0
+        self._head = (i + 1) % self.buffer_size
+        if self._size < self.buffer_size:
+            self._size += 1
+
+    def add_trajectory(self, observations, players, policies, values):
+        """Add a whole game at once from per-field arrays (e.g. a TrajectoryBuffer's views)."""
+        n = len(players)
+        if n > self.buffer_size:  # Only the newest buffer_size steps would survive anyway
+            observations, players, policies, values = (
+                observations[-self.buffer_size:], players[-self.buffer_size:],
+                policies[-self.buffer_size:], values[-self.buffer_size:])
+            n = self.buffer_size
+        idx = (self._head + np.arange(n)) % self.buffer_size
+        self.observations[idx] = observations
+        self.policies[idx] = policies
+        self.players[idx] = players
+        self.values[idx] = values
+        self._head = (self._head + n) % self.buffer_size
+        self._size = min(self._size + n, self.buffer_size)
 
     def sample(self, batch_size):
-        return np.array(random.sample(self.buffer, batch_size), dtype=object)
+        """Returns (observations, policy_targets, value_targets) arrays for a random batch."""
+        idx = np.random.randint(0, self._size, batch_size)
+        return self.observations[idx], self.policies[idx], self.values[idx]
 
     def __len__(self):
-        return len(self.buffer)
+        return self._size
+
+# One game's trajectory as preallocated per-field arrays (structure of arrays).
+# Each actor reuses a single instance; rows are written in place by move index.
+class TrajectoryBuffer:
+    def __init__(self, max_length, observation_size, num_actions, num_players, arrays=None):
+        self.max_length = max_length
+        if arrays is None:
+            arrays = (np.zeros((max_length, observation_size), dtype=OBSERVATION_DTYPE),
+                      np.zeros(max_length, dtype=np.int8),
+                      np.zeros((max_length, num_actions), dtype=np.float32),
+                      np.zeros((max_length, num_players), dtype=np.float32))
+        self.observations, self.players, self.policies, self.rewards = arrays
+        self.length = 0
+
+    def arrays(self):
+        """(observations, players, policies, rewards) views of the recorded steps."""
+        n = self.length
+        return self.observations[:n], self.players[:n], self.policies[:n], self.rewards[:n]
+
+    def copy_arrays(self):
+        """Like arrays(), but detached from the reused buffers (safe to queue)."""
+        return tuple(a.copy() for a in self.arrays())
+
+# A pool of TrajectoryBuffer slots in one shared-memory block. The learner owns it;
+# actors fill a slot in place and send only its id, so trajectories are never pickled.
+class SharedTrajectorySlots:
+    def __init__(self, num_slots, max_length, observation_size, num_actions, num_players, name=None):
+        self.layout = (num_slots, max_length, observation_size, num_actions, num_players)
+        # The one-byte observation and players fields go last so the float32 fields stay aligned
+        fields = [((num_slots, max_length, num_actions), np.float32),
+                  ((num_slots, max_length, num_players), np.float32),
+                  ((num_slots, max_length, observation_size), OBSERVATION_DTYPE),
+                  ((num_slots, max_length), np.int8)]
+        sizes = [int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in fields]
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, sum(sizes)))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        blocks = []
+        offset = 0
+        for (shape, dtype), size in zip(fields, sizes):
+            blocks.append(np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+            offset += size
+        policies, rewards, observations, players = blocks
+        self.slots = [
+            TrajectoryBuffer(max_length, observation_size, num_actions, num_players,
+                             arrays=(observations[i], players[i], policies[i], rewards[i]))
+            for i in range(num_slots)]
+
+    @classmethod
+    def attach(cls, spec):
+        """Open the creator's block from its picklable spec()."""
+        name, layout = spec
+        return cls(*layout, name=name)
+
+    def spec(self):
+        return (self.shm.name, self.layout)
+
+    def close(self, unlink=False):
+        self.slots = []  # Views must be released before the buffer can close
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+# Model weights packed into one shared-memory block. The trainer writes into it and
+# actors read through NumPy views, so weights never get pickled through a queue.
+class SharedWeights:
+    def __init__(self, name, shapes, dtypes, create=False):
+        self.shapes = [tuple(shape) for shape in shapes]
+        self.dtypes = [np.dtype(dtype).str for dtype in dtypes]
+        sizes = [int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in zip(self.shapes, self.dtypes)]
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, sum(sizes)))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.views = []
+        offset = 0
+        for shape, dtype, size in zip(self.shapes, self.dtypes, sizes):
+            self.views.append(np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+            offset += size
+
+    @classmethod
+    def from_weights(cls, weights):
+        """Allocate a new block sized for `weights` (a Keras get_weights() list) and fill it."""
+        shared = cls(None, [w.shape for w in weights], [w.dtype for w in weights], create=True)
+        shared.write(weights)
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """Open an existing block from the picklable spec() of its creator."""
+        return cls(*spec)
+
+    def spec(self):
+        return (self.shm.name, self.shapes, self.dtypes)
+
+    def write(self, weights):
+        for view, weight in zip(self.views, weights):
+            np.copyto(view, weight)
+
+    def close(self, unlink=False):
+        self.views = []  # Views must be released before the buffer can close
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
 
 class SimpleAgent:
     # ** Accept num_players in constructor **
-    def __init__(self, observation_shape, num_actions, num_players, learning_rate=0.001):
-        # Create two separate models
+    def __init__(self, observation_shape, num_actions, num_players, learning_rate=0.001, mixed_precision=False):
+        # Create two separate models. With mixed_precision the layers compute in float16
+        # while their variables (and so get_weights() for the actors) stay float32.
+        self.mixed_precision = mixed_precision
+        if mixed_precision:
+            tf.keras.mixed_precision.set_global_policy('mixed_float16')
         self.policy_model = create_mali_ba_policy_network(observation_shape, num_actions)
         self.value_model = create_mali_ba_value_network(observation_shape, num_players)
+        if mixed_precision:
+            tf.keras.mixed_precision.set_global_policy('float32')
         
-        # Create two separate optimizers
+        # Create two separate optimizers; loss scaling keeps float16 gradients from underflowing
         self.policy_optimizer = tf.keras.optimizers.Adam(learning_rate=learning_rate)
         self.value_optimizer = tf.keras.optimizers.Adam(learning_rate=learning_rate)
+        if mixed_precision:
+            self.policy_optimizer = tf.keras.mixed_precision.LossScaleOptimizer(self.policy_optimizer)
+            self.value_optimizer = tf.keras.mixed_precision.LossScaleOptimizer(self.value_optimizer)
         
         self.num_players = num_players
+        # Forward/backward passes as one graph with a fixed signature: traced once, then
+        # each batch runs without per-op eager dispatch
+        self._compute_gradients_fn = tf.function(self._compute_gradients, jit_compile=XLA_JIT_COMPILE, input_signature=[
+            tf.TensorSpec(shape=(None, *observation_shape), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, num_actions), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, num_players), dtype=tf.float32)])
     
     def save_model(self, path):
         """Saves the policy and value model weights to separate files."""
@@ -115,9 +442,11 @@ class SimpleAgent:
 
             log(LogLevel.INFO, f"Agent: Saving policy model weights to {policy_path}")
             self.policy_model.save_weights(policy_path)
+            _save_raw_weights(self.policy_model, policy_path)
             
             log(LogLevel.INFO, f"Agent: Saving value model weights to {value_path}")
             self.value_model.save_weights(value_path)
+            _save_raw_weights(self.value_model, value_path)
             
             log(LogLevel.INFO, "Agent: Model weights saved successfully.")
             
@@ -127,93 +456,94 @@ class SimpleAgent:
             log(LogLevel.ERROR, f"Agent: Full traceback: {traceback.format_exc()}")
 
     def load_model(self, path):
-        # Load both models' weights
-        self.policy_model.load_weights(path.replace("weights.h5", "_policy.weights.h5"))
-        self.value_model.load_weights(path.replace("weights.h5", "_value.weights.h5"))
-
+        # Load both models' weights, preferring the mmap'd raw sidecar over HDF5
+        for model, model_path in ((self.policy_model, path.replace("weights.h5", "_policy.weights.h5")),
+                                  (self.value_model, path.replace("weights.h5", "_value.weights.h5"))):
+            try:
+                if _load_raw_weights(model, model_path):
+                    continue
+            except Exception as e:
+                log(LogLevel.WARN, f"Agent: Raw weight load failed for {model_path}, using HDF5: {e}")
+            model.load_weights(model_path)
+
+
+    def _compute_gradients(self, observations, policy_targets, value_targets):
+        """Losses, gradients and predictions of both networks for one batch (traced in __init__)."""
+        if LOG_DEBUG_ENABLED:
+            # Raises InvalidArgumentError (so train() skips the batch) on NaN/Inf targets.
+            # Observations are uint8 in the buffer and cannot be NaN.
+            policy_targets = tf.debugging.check_numerics(policy_targets, "policy targets")
+            value_targets = tf.debugging.check_numerics(value_targets, "value targets")
+        with tf.GradientTape() as tape:
+            predicted_policy = self.policy_model(observations, training=True)
+            policy_loss = tf.reduce_mean(tf.keras.losses.categorical_crossentropy(policy_targets, predicted_policy))
+            # The LossScaleOptimizer unscales these gradients again in apply_gradients()
+            scaled_policy_loss = self.policy_optimizer.scale_loss(policy_loss) if self.mixed_precision else policy_loss
+        policy_grads = tape.gradient(scaled_policy_loss, self.policy_model.trainable_variables)
+
+        with tf.GradientTape() as tape:
+            predicted_value = self.value_model(observations, training=True)
+            value_loss = tf.reduce_mean(tf.keras.losses.mean_squared_error(value_targets, predicted_value))
+            scaled_value_loss = self.value_optimizer.scale_loss(value_loss) if self.mixed_precision else value_loss
+        value_grads = tape.gradient(scaled_value_loss, self.value_model.trainable_variables)
+        return policy_loss, value_loss, policy_grads, value_grads, predicted_policy, predicted_value
     
     def train(self, replay_buffer, batch_size):
         if len(replay_buffer) < batch_size:
             return None
 
         try:
-            samples = replay_buffer.sample(batch_size)
-            observations, policy_targets, value_data_list = zip(*samples)
-
             # --- Data Preparation ---
-            observations_flat = np.array(observations)
+            # The ring buffer hands back ready-made batch arrays
+            observations_flat, policy_targets, full_value_targets = replay_buffer.sample(batch_size)
             target_shape_3d = self.policy_model.input_shape[1:]
-            observations_reshaped = observations_flat.reshape((-1, *target_shape_3d))
+            observations_reshaped = observations_flat.astype(np.float32).reshape((-1, *target_shape_3d))
+            # Input NaN/Inf checks run inside the traced step, and only at DEBUG level; a bad
+            # batch still shows up as an invalid loss below and is skipped
 
-            policy_targets = np.array(policy_targets)
-            
-            full_value_targets = np.zeros((batch_size, self.num_players))
-            for i, (player_id, player_value, all_discounted_returns) in enumerate(value_data_list):
-                if i >= batch_size: break
-                for p in range(self.num_players):
-                    if p < len(all_discounted_returns):
-                        full_value_targets[i, p] = all_discounted_returns[p]
-            
-            # --- Input Sanity Checks ---
-            if np.any(np.isnan(observations_reshaped)) or np.any(np.isinf(observations_reshaped)):
-                log(LogLevel.ERROR, "Trainer: NaN/Inf detected in observation data. Skipping batch.")
-                return None
-            if np.any(np.isnan(policy_targets)) or np.any(np.isinf(policy_targets)):
-                log(LogLevel.ERROR, "Trainer: NaN/Inf detected in policy target data. Skipping batch.")
-                return None
-            if np.any(np.isnan(full_value_targets)) or np.any(np.isinf(full_value_targets)):
-                log(LogLevel.ERROR, "Trainer: NaN/Inf detected in value target data. Skipping batch.")
-                return None
+            # --- Forward and backward passes for both models (graph-compiled) ---
+            policy_loss, value_loss, policy_grads, value_grads, predicted_policy, predicted_value = self._compute_gradients_fn(
+                tf.convert_to_tensor(observations_reshaped), tf.convert_to_tensor(policy_targets),
+                tf.convert_to_tensor(full_value_targets))
 
-            # --- Policy Model Training Step ---
-            with tf.GradientTape() as tape:
-                predicted_policy = self.policy_model(observations_reshaped, training=True)
-                policy_loss = tf.keras.losses.CategoricalCrossentropy()(policy_targets, predicted_policy)
-            
+            # --- Policy Model Update ---
             if tf.math.is_nan(policy_loss) or tf.math.is_inf(policy_loss):
                 log(LogLevel.ERROR, f"Trainer: Invalid policy loss detected: {policy_loss}. Skipping batch.")
                 return None
             
-            policy_grads = tape.gradient(policy_loss, self.policy_model.trainable_variables)
             if any(g is None for g in policy_grads):
                 log(LogLevel.ERROR, "Trainer: None gradients detected for policy model. Skipping batch.")
                 return None
             self.policy_optimizer.apply_gradients(zip(policy_grads, self.policy_model.trainable_variables))
             
-            # --- Value Model Training Step ---
-            with tf.GradientTape() as tape:
-                predicted_value = self.value_model(observations_reshaped, training=True)
-                value_loss = tf.keras.losses.MeanSquaredError()(full_value_targets, predicted_value)
-
-            # DEBUG =====================================================================
-            log(LogLevel.INFO, f"Training: Observation range: min={np.min(observations_reshaped):.6f}, max={np.max(observations_reshaped):.6f}")
-            log(LogLevel.INFO, f"Training: Observation mean={np.mean(observations_reshaped):.6f}, std={np.std(observations_reshaped):.6f}")
-            log(LogLevel.INFO, f"Training: Policy target range: min={np.min(policy_targets):.6f}, max={np.max(policy_targets):.6f}")
-            log(LogLevel.INFO, f"Training: Policy target sum per sample: {np.sum(policy_targets, axis=1)[:5]}")  # Should be 1.0 for each
-            # END DEBUG =====================================================================
+            # --- Value Model Update ---
+            if LOG_DEBUG_ENABLED:
+                log(LogLevel.DEBUG, f"Training: Observation range: min={np.min(observations_reshaped):.6f}, max={np.max(observations_reshaped):.6f}")
+                log(LogLevel.DEBUG, f"Training: Observation mean={np.mean(observations_reshaped):.6f}, std={np.std(observations_reshaped):.6f}")
+                log(LogLevel.DEBUG, f"Training: Policy target range: min={np.min(policy_targets):.6f}, max={np.max(policy_targets):.6f}")
+                log(LogLevel.DEBUG, f"Training: Policy target sum per sample: {np.sum(policy_targets, axis=1)[:5]}")  # Should be 1.0 for each
 
             if tf.math.is_nan(value_loss) or tf.math.is_inf(value_loss):
                 log(LogLevel.ERROR, f"Trainer: Invalid value loss detected: {value_loss}. Skipping batch.")
                 return None
 
-            value_grads = tape.gradient(value_loss, self.value_model.trainable_variables)
             if any(g is None for g in value_grads):
                 log(LogLevel.ERROR, "Trainer: None gradients detected for value model. Skipping batch.")
                 return None
             self.value_optimizer.apply_gradients(zip(value_grads, self.value_model.trainable_variables))
 
             # --- Logging and Return ---
-            total_loss = policy_loss + value_loss
-            log(LogLevel.INFO, f"Training: Total Loss={total_loss.numpy():.4f} (Policy={policy_loss.numpy():.4f}, Value={value_loss.numpy():.4f})")
+            # One device-to-host read of the two scalars
+            policy_loss_value, value_loss_value = float(policy_loss), float(value_loss)
+            total_loss_value = policy_loss_value + value_loss_value
+            log(LogLevel.INFO, f"Training: Total Loss={total_loss_value:.4f} (Policy={policy_loss_value:.4f}, Value={value_loss_value:.4f})")
             
-            # DEBUG ==================================================================
-            log(LogLevel.INFO, f"Training: Gradient norms: {[tf.norm(g).numpy() for g in value_grads[:3]]}")
-            log(LogLevel.INFO, f"Training: Policy output sample: {predicted_policy[0][:10].numpy()}")
-            log(LogLevel.INFO, f"Training: Value output sample: {predicted_value[0].numpy()}")
-            log(LogLevel.INFO, f"Training: Total loss: {total_loss.numpy():.6f}, Policy loss: {policy_loss.numpy():.6f}, Value loss: {value_loss.numpy():.6f}")
-            # END DEBUG ==================================================================
+            if LOG_DEBUG_ENABLED:
+                log(LogLevel.DEBUG, f"Training: Gradient norms: {[tf.norm(g).numpy() for g in value_grads[:3]]}")
+                log(LogLevel.DEBUG, f"Training: Policy output sample: {predicted_policy[0][:10].numpy()}")
+                log(LogLevel.DEBUG, f"Training: Value output sample: {predicted_value[0].numpy()}")
             
-            return total_loss.numpy()
+            return total_loss_value
 
         except Exception as e:
             log(LogLevel.ERROR, f"Trainer: An unexpected error occurred during training: {e}")
@@ -225,25 +555,59 @@ class SimpleAgent:
 class AlphaZeroEvaluator:
     """An evaluator for MCTS that uses a trained neural network."""
 
-    def __init__(self, game, policy_model, value_model): # Takes two models now
+    def __init__(self, game, policy_model, value_model, policy_cache_size=128): # Takes two models now
         self._game = game
         self._policy_model = policy_model # Store policy model
         self._value_model = value_model   # Store value model
-        self._shape = game.observation_tensor_shape()
+        self._shape = tuple(game.observation_tensor_shape())
+        self._num_actions = game.num_distinct_actions()
+        # Reused host buffer; the C++ state writes each leaf's observation straight into it
+        self._obs_batch = np.zeros((1, *self._shape), dtype=np.float32)
+        self._obs_flat = self._obs_batch.reshape(-1)  # View for observation_tensor_into
+        # Persistent input tensor: each leaf assigns into it instead of converting a new one
+        self._obs_var = tf.Variable(self._obs_batch, trainable=False)
+        # Graph-compiled inference on that input: traced once, then every MCTS leaf runs
+        # both networks in a single call, skipping Keras' Python wrapper
+        self._infer_fn = tf.function(
+            lambda: (policy_model(self._obs_var, training=False), value_model(self._obs_var, training=False)),
+            jit_compile=XLA_JIT_COMPILE)
+        # Reused full-action-space heuristic policy for prior()
+        self._heuristic_policy = np.zeros(self._num_actions, dtype=np.float32)
         self.heuristic_guidance_weight = 0.25
+        # Policies of evaluated-but-not-yet-expanded leaves, keyed by history (see _predict)
+        self._policy_cache = collections.OrderedDict()
+        self._policy_cache_size = policy_cache_size
+
+    def _predict(self, state):
+        """Returns (policy, value) for `state`, running both networks together."""
+        pyspiel.mali_ba.downcast_state(state).observation_tensor_into(self._obs_flat)
+        self._obs_var.assign(self._obs_batch)
+        policy, value = self._infer_fn()
+        return policy[0].numpy(), value[0].numpy()
+
+    def reset(self):
+        """Drop the cached leaf policies, e.g. after the models' weights change."""
+        self._policy_cache.clear()
+
+    def _cache_policy(self, state, policy):
+        """Keep `policy` for the later prior() call that expands this leaf.
+
+        MCTSBot evaluates a new leaf at the end of one simulation but only asks for
+        its prior when a later simulation revisits and expands it, so the policy from
+        evaluate() is held until then (least recently cached entries drop first).
+        """
+        self._policy_cache[state.history_str()] = policy
+        if len(self._policy_cache) > self._policy_cache_size:
+            self._policy_cache.popitem(last=False)
 
     def evaluate(self, state):
         if state.is_terminal():
             return np.array(state.returns(), dtype=np.float32)
         
-        obs_flat = state.observation_tensor()
-        obs_reshaped = np.reshape(obs_flat, self._shape)
-        obs_batch = np.expand_dims(obs_reshaped, 0)
-        
         # Use the value model for evaluation
-        value_tensor = self._value_model(obs_batch, training=False)
-        
-        return value_tensor[0].numpy()
+        policy, value = self._predict(state)
+        self._cache_policy(state, policy)
+        return value
 
     def prior(self, state):
         if state.is_terminal():
@@ -253,23 +617,24 @@ class AlphaZeroEvaluator:
         if not legal_actions:
             return []
 
-        obs_flat = state.observation_tensor()
-        obs_reshaped = np.reshape(obs_flat, self._shape)
-        obs_batch = np.expand_dims(obs_reshaped, 0)
-        
         # --- 1. Get Neural Network Policy (as before) ---
-        # Use the policy model for priors
-        policy_nn = self._policy_model(obs_batch, training=False)
-        policy_nn_full = policy_nn[0].numpy()
+        # Use the policy model for priors; a leaf is expanded once, so its entry is consumed
+        policy_nn_full = self._policy_cache.pop(state.history_str(), None)
+        if policy_nn_full is None:
+            policy_nn_full, _ = self._predict(state)
 
         # --- 2. Get Heuristic Policy ---
         mali_ba_state = pyspiel.mali_ba.downcast_state(state)
         action_weights_map = mali_ba_state.get_heuristic_action_weights()
-        policy_heuristic_full = np.zeros(self._game.num_distinct_actions(), dtype=np.float32)
-        total_weight = sum(action_weights_map.values())
-        if total_weight > 0:
-            for act, weight in action_weights_map.items():
-                policy_heuristic_full[act] = weight / total_weight
+        policy_heuristic_full = self._heuristic_policy
+        policy_heuristic_full.fill(0.0)
+        num_weighted = len(action_weights_map)
+        if num_weighted:
+            weighted_actions = np.fromiter(action_weights_map.keys(), dtype=np.int64, count=num_weighted)
+            weights = np.fromiter(action_weights_map.values(), dtype=np.float32, count=num_weighted)
+            total_weight = weights.sum()
+            if total_weight > 0:
+                policy_heuristic_full[weighted_actions] = weights / total_weight
 
         # --- 3. Mix the Policies ---
         # final_policy = (1 - w) * P_nn + w * P_heuristic
@@ -279,13 +644,11 @@ class AlphaZeroEvaluator:
         )
 
         # --- 4. Return the mixed policy for legal actions (as before) ---
-        legal_policy = []
-        for action in legal_actions:
-            legal_policy.append((action, mixed_policy_full[action]))
+        legal_policy = mixed_policy_full[np.asarray(legal_actions, dtype=np.int64)]
         
-        total_prob = sum(p for _, p in legal_policy)
+        total_prob = legal_policy.sum()
         if total_prob > 0:
-            return [(action, p / total_prob) for action, p in legal_policy]
+            return list(zip(legal_actions, (legal_policy / total_prob).tolist()))
         else:
             # Fallback to uniform if all mixed probabilities are zero
             uniform_prob = 1.0 / len(legal_actions)
@@ -314,7 +677,8 @@ def create_mali_ba_policy_network(observation_shape, num_actions):
     policy_head = layers.BatchNormalization()(policy_head)
     policy_head = layers.Activation('relu')(policy_head)
     policy_head = layers.Flatten()(policy_head)
-    policy_head = layers.Dense(num_actions, activation='softmax', name='policy')(policy_head)
+    # Output layers stay float32 under a mixed-precision policy for a stable softmax/tanh
+    policy_head = layers.Dense(num_actions, activation='softmax', name='policy', dtype='float32')(policy_head)
     
     return models.Model(inputs=inputs, outputs=policy_head)
 
@@ -341,6 +705,6 @@ def create_mali_ba_value_network(observation_shape, num_players):
     value_head = layers.Activation('relu')(value_head)
     value_head = layers.Flatten()(value_head)
     value_head = layers.Dense(64, activation='relu')(value_head)
-    value_head = layers.Dense(num_players, activation='tanh', name='value')(value_head)
+    value_head = layers.Dense(num_players, activation='tanh', name='value', dtype='float32')(value_head)
     
     return models.Model(inputs=inputs, outputs=value_head)
\ No newline at end of file
@@ -441,12 +441,15 @@ class ControlPanel:
         self.status_message = "Game Started. Parsing state..."
         self.buttons: Dict[str, pygame.Rect] = {}  # Store button name -> rect mapping
         self.checkboxes: Dict[str, Tuple[pygame.Rect, bool]] = {}  # Store checkbox name -> (rect, checked) mapping
+        self.dirty = True  # Status changed since the last draw
 
     def update_rect(self, new_rect):
         self.rect = new_rect
 
     def update_status(self, message: str):
-        self.status_message = message
+        if message != self.status_message:
+            self.status_message = message
+            self.dirty = True
 
     def draw(self, surface, zoom, is_input_mode, input_mode_type, state_cache: GameStateCache, show_trade_routes: bool = True):
         self.buttons.clear()  # Clear old buttons before drawing new ones
@@ -4,7 +4,6 @@ from mali_ba.config import *
 from mali_ba.classes.classes_other import TradePost, City, HexCoord, TradePostType, SimpleReplayManager
 from mali_ba.classes.game_state import GameStateCache
 from mali_ba.ui.gui_other import InteractiveObject, InteractiveObjectManager, ControlPanel, Sidebar, DialogBox
-from mali_ba.utils.cpp_interface import GameInterface
 from mali_ba.ui.visualizer_other import BoardVisualizerHelpers, parse_and_update_state_from_json, can_start_mancala_at, is_valid_mancala_step, can_select_for_upgrade, can_add_to_trade_route
 
 # Import the new drawing and parsing modules
@@ -15,15 +14,12 @@ import json
 import math
 import os
 import traceback
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
 
-
-# Import pyspiel if needed (handle potential ImportError)
-try:
-    import pyspiel
-except ImportError:
-    print("Warning: pyspiel module not found. C++ integration might fail if not bypassed.")
-    pyspiel = None
+# Only needed for annotations; importing it pulls in pyspiel, which replay mode
+# does not use.
+if TYPE_CHECKING:
+    from mali_ba.utils.cpp_interface import GameInterface
 
 
 # --- Main Board Visualizer Class ---
@@ -33,7 +29,7 @@ class BoardVisualizer:
     communicating with the C++ OpenSpiel backend.
     (Core logic: Event handling, state management, UI orchestration)
     """
-    def __init__(self, game_interface: Optional[GameInterface], game_player_colors: List[PlayerColor],
+    def __init__(self, game_interface: Optional['GameInterface'], game_player_colors: List[PlayerColor],
                  initialize_pygame=True, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
                  replay_manager: Optional[SimpleReplayManager] = None):
         """Initializes the visualizer."""
@@ -77,13 +73,13 @@ class BoardVisualizer:
             print("Visualizer running in Replay Mode.")
             self.state_cache.grid_radius = self.replay_manager.get_grid_radius()
             self.state_cache.valid_hexes = self.replay_manager.get_valid_hexes()
-            self.state_cache.cities = self.replay_manager.get_cities()
+            self.state_cache.set_cities(self.replay_manager.get_cities())
         elif self.game_interface:
             # In live modes, get from the C++ engine
             print("Visualizer running in Live C++ Mode.")
             valid_hexes, cities, grid_radius = self.game_interface.get_board_config_data()
             self.state_cache.valid_hexes = valid_hexes
-            self.state_cache.cities = cities
+            self.state_cache.set_cities(cities)
             self.state_cache.grid_radius = grid_radius
         else:
             raise RuntimeError("Visualizer must be initialized with either a GameInterface or a ReplayManager.")
@@ -118,6 +114,7 @@ class BoardVisualizer:
             raise RuntimeError("Failed to obtain valid_hexes. Cannot start visualizer.")
         
         self.is_resizing = False  
+        self.dirty = True  # Set when something on screen changed; cleared by draw()
         self.last_resize_time = 0
 
         self.update_zoom_limits()
@@ -126,7 +123,7 @@ class BoardVisualizer:
 
         # Load initial state depending on the mode
         if self.is_replay_mode:
-            initial_state_json = self.replay_manager.get_current_state_json()
+            initial_state_json = self.replay_manager.get_current_state()
         else:
             initial_state_json = self.game_interface.get_current_state_string()
 
@@ -134,10 +131,11 @@ class BoardVisualizer:
             raise RuntimeError("FATAL: Could not parse initial state.")
 
 
-    def parse_and_update_state(self, state_string: str) -> bool:
-        """Parses the authoritative state string and updates the cache."""
+    def parse_and_update_state(self, state_string: Union[str, Dict[str, Any]]) -> bool:
+        """Parses the authoritative state (JSON string or C++ state view) and updates the cache."""
         # This now calls the correctly imported function
         success = parse_and_update_state_from_json(state_string, self.state_cache)
+        self.dirty = True
         if success:
             self.helpers.update_status_from_cache()
             # IF WE have machine players, play their turn automatically
@@ -381,6 +379,7 @@ class BoardVisualizer:
         self.update_layout()
         dialog_width, dialog_height = 400, 200
         self.dialog_box.rect = pygame.Rect((self.width - dialog_width) // 2, (self.height - dialog_height) // 2, dialog_width, dialog_height)
+        self.dirty = True
 
 
     def start_input_mode(self, mode_type: str):
@@ -460,6 +459,8 @@ class BoardVisualizer:
         self.control_panel.draw(self.screen, self.zoom, self.is_input_mode, self.input_mode_type, self.state_cache, self.show_trade_routes)
         self.dialog_box.draw(self.screen)
         pygame.display.flip()
+        self.dirty = False
+        self.control_panel.dirty = False
 
 
     # --- Map displaying
@@ -755,30 +756,31 @@ class BoardVisualizer:
                             print(pygame.key.name(event.key))
                             if event.key in (pygame.K_RIGHT, pygame.K_DOWN):
                                 if self.replay_manager.try_go_forward():
-                                    self.parse_and_update_state(self.replay_manager.get_current_state_json())
+                                    self.parse_and_update_state(self.replay_manager.get_current_state())
                                     self.control_panel.update_status(self.replay_manager.get_move_info())
                             elif event.key in (pygame.K_PAGEDOWN, pygame.K_KP3):
-                                for i in range(10):
-                                    if not self.replay_manager.try_go_forward():
-                                        print("Skipped forward less than 10 moves.")
-                                        break
-                                    else:
-                                        print("Skipped forward 10 moves.")
-                                        self.parse_and_update_state(self.replay_manager.get_current_state_json())
-                                        self.control_panel.update_status(self.replay_manager.get_move_info())
+                                # Jump first, then decode/parse only the state we land on
+                                moved = self.replay_manager.step(10)
+                                if moved < 10:
+                                    print("Skipped forward less than 10 moves.")
+                                else:
+                                    print("Skipped forward 10 moves.")
+                                if moved:
+                                    self.parse_and_update_state(self.replay_manager.get_current_state())
+                                    self.control_panel.update_status(self.replay_manager.get_move_info())
                             elif event.key in (pygame.K_LEFT, pygame.K_UP):
                                 if self.replay_manager.try_go_backward():
-                                    self.parse_and_update_state(self.replay_manager.get_current_state_json())
+                                    self.parse_and_update_state(self.replay_manager.get_current_state())
                                     self.control_panel.update_status(self.replay_manager.get_move_info())
                             elif event.key in (pygame.K_PAGEUP, pygame.K_KP9):
-                                for i in range(10):
-                                    if not self.replay_manager.try_go_backward():
-                                        print("Skipped backward less than 10 moves.")
-                                        break
-                                    else:
-                                        print("Skipped backward 10 moves.")
-                                        self.parse_and_update_state(self.replay_manager.get_current_state_json())
-                                        self.control_panel.update_status(self.replay_manager.get_move_info())
+                                moved = self.replay_manager.step(-10)
+                                if moved < 10:
+                                    print("Skipped backward less than 10 moves.")
+                                else:
+                                    print("Skipped backward 10 moves.")
+                                if moved:
+                                    self.parse_and_update_state(self.replay_manager.get_current_state())
+                                    self.control_panel.update_status(self.replay_manager.get_move_info())
                             elif event.key == pygame.K_ESCAPE:
                                 running = False
                             continue # Don't process other key events in replay mode
@@ -2,7 +2,7 @@
 import sys
 sys.path.append("/media/robp/UD/Projects/mali_ba/open_spiel/python/games") # allow debugging in vs code
 import json
-from typing import List
+from typing import Any, Dict, List, Union
 from mali_ba.config import PlayerColor, MeepleColor, TradePostType, Phase
 from mali_ba.classes.game_state import GameStateCache
 from mali_ba.classes.classes_other import TradePost, City, HexCoord, TradeRoute
@@ -59,13 +59,14 @@ def can_add_to_trade_route(hex_coord: HexCoord, player_color: PlayerColor, cache
 
 
 # --- State Parsing (Simplified) ---
-def parse_and_update_state_from_json(state_str: str, cache: GameStateCache) -> bool:
+def parse_and_update_state_from_json(state_str: Union[str, Dict[str, Any]], cache: GameStateCache) -> bool:
     """
     Parses the authoritative C++ JSON state string and completely updates the cache.
     This is now the ONLY way the GameStateCache is modified.
     
     Args:
-        state_str: The JSON string from C++'s `serialize()`.
+        state_str: The JSON string from C++'s `serialize()`, or the already-parsed
+            dict from `state_view()` (live modes), which skips json.loads.
         cache: The GameStateCache object to update.
         
     Returns:
@@ -73,11 +74,14 @@ def parse_and_update_state_from_json(state_str: str, cache: GameStateCache) -> b
     """
     # print(f"\n--- DEBUG: Parsing New State JSON ---\n{state_str[:300]}...\n--------------------------")
     
-    try:
-        data = json.loads(state_str)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON received: {e}")
-        return False
+    if isinstance(state_str, dict):
+        data = state_str
+    else:
+        try:
+            data = json.loads(state_str)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON received: {e}")
+            return False
 
     try:
         # Clear all dynamic content from the cache.
@@ -85,6 +89,7 @@ def parse_and_update_state_from_json(state_str: str, cache: GameStateCache) -> b
         cache.player_token_locations.clear()
         cache.hex_meeples.clear()
         cache.trade_posts_locations.clear()
+        cache.owner_posts.clear()
         cache.trade_routes.clear()
         
         num_players = len(cache.game_player_colors)
@@ -123,6 +128,8 @@ def parse_and_update_state_from_json(state_str: str, cache: GameStateCache) -> b
                 posts_obj = [TradePost(PlayerColor.from_int(p["owner"]), TradePostType.from_int(p["type"])) for p in posts_json]
                 if posts_obj:
                     cache.trade_posts_locations[hex_coord] = posts_obj
+                    for post in posts_obj:
+                        cache.owner_posts[post.owner].add(hex_coord)
 
         # Goods
         cache.common_goods = data.get("commonGoods", [{} for _ in range(num_players)])
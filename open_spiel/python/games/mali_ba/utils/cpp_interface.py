@@ -5,7 +5,7 @@ Follows a client-server model where C++ is the engine and Python is the client.
 """
 import sys
 import json
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Set, Union
 
 # Ensure pyspiel is available
 try:
@@ -24,19 +24,28 @@ except ImportError:
 from mali_ba.classes.classes_other import HexCoord, City
 # from mali_ba.utils.board_config import BoardConfig
 
+# A parsed state as produced by the C++ state_view() binding (the same dict
+# json.loads(serialize()) gives, built without the string round trip).
+StateView = Dict[str, Any]
+
 class GameInterface:
     """A thin client interface to the C++ OpenSpiel game engine."""
+
+    # Integer command understood by apply_action_id(): let C++ play one random
+    # move. Real action ids are >= 0 and -1 is pyspiel.INVALID_ACTION.
+    ACTION_RANDOM = -2
     
     # For individual games kicked off by the Python front end I want to have move logging for replay
     # on as the default
     def __init__(self, config_file_path: Optional[str] = None, enable_move_logging: bool = True, 
-                 prune_moves_for_ai: bool = True, player_types: str = "ai,ai,ai"):
+                 prune_moves_for_ai: bool = True, player_types: Union[str, Sequence] = "ai,ai,ai"):
         """
         Initializes the GameInterface by loading the C++ game engine.
         
         Args:
             config_file_path: Path to the .ini configuration file.
-            player_types: Comma-separated string of player types (human, ai, heuristic).
+            player_types: Comma-separated string of player types (human, ai, heuristic),
+                or an already-validated sequence of PlayerType members / type strings.
         """
         self.spiel_game: Optional['pyspiel.Game'] = None
         self.spiel_state: Optional['pyspiel.State'] = None
@@ -44,7 +53,12 @@ class GameInterface:
         self.config_file_path = config_file_path
         self.enable_move_logging = enable_move_logging
         self.prune_moves_for_ai = prune_moves_for_ai
-        self.player_types = player_types 
+        # Normalized once; get_player_types() is queried after every state update
+        if isinstance(player_types, str):
+            self._player_types_list = tuple(p_type.strip() for p_type in player_types.split(','))
+        else:
+            self._player_types_list = tuple(getattr(p_type, 'value', p_type) for p_type in player_types)
+        self.player_types = ",".join(self._player_types_list) # C++ game parameter
 
         if self.is_bypassing:
             print("🐍 C++ backend not available or bypassed. Running in Python-only mode is not supported by this refactor.")
@@ -88,9 +102,9 @@ class GameInterface:
             raise
 
 
-    def apply_action(self, action_string: str) -> Tuple[bool, str, Optional[str]]:
+    def apply_action(self, action_string: str) -> Tuple[bool, str, Optional[StateView]]:
         """
-        Applies an action to the C++ game state.
+        Applies an action to the C++ game state and returns the resulting state view.
         Handles a special command "play_random_move" for cpp_sync_gui mode.
         """
         if self.is_bypassing:
@@ -99,13 +113,7 @@ class GameInterface:
         try:
             # Special case for the C++ driven loop
             if action_string == "play_random_move":
-                if self.spiel_state.is_terminal():
-                    return False, "Game is terminal.", None
-                
-                # C++ State has a method to play a random move and serialize the result
-                # We need to expose this via pybind11
-                new_state_json = self.spiel_state.play_random_move_and_serialize()
-                return True, "Random move applied.", new_state_json
+                return self.apply_action_id(self.ACTION_RANDOM)
 
             # Standard action application
             action_id = self.spiel_state.string_to_action(action_string)
@@ -113,15 +121,54 @@ class GameInterface:
                 # ... (error handling as before) ...
                 return False, f"Invalid action: {action_string}", None
             
-            self.spiel_state.apply_action(action_id)
-            new_state_json = self.spiel_state.serialize()
-            return True, "Action applied successfully.", new_state_json
+            return self.apply_action_id(action_id)
             
         except Exception as e:
             # ... (exception handling as before) ...
             return False, f"C++ Error: {e}", None
 
 
+    def apply_action_id(self, action_id: int) -> Tuple[bool, str, Optional[StateView]]:
+        """
+        Applies an already-encoded action id (or ACTION_RANDOM) and returns the
+        resulting state view, skipping the move-string parse.
+        """
+        if self.is_bypassing:
+            return False, "C++ backend is not available.", None
+
+        try:
+            if action_id == self.ACTION_RANDOM:
+                if self.spiel_state.is_terminal():
+                    return False, "Game is terminal.", None
+                _, _, new_state = self.spiel_state.play_random_moves_and_view(1)
+                return True, "Random move applied.", new_state
+
+            self.spiel_state.apply_action(action_id)
+            return True, "Action applied successfully.", self.spiel_state.state_view()
+
+        except Exception as e:
+            return False, f"C++ Error: {e}", None
+
+
+    def play_random_batch(self, max_moves: int = 1) -> Tuple[bool, str, bool, List[float], Optional[StateView]]:
+        """
+        Plays up to max_moves random moves entirely in C++ (cpp_sync_gui mode).
+        Returns (success, message, is_terminal, returns, new_state) from a single
+        C++ call, so the caller doesn't need separate is_terminal()/returns()
+        round trips. returns is only filled in once the game is terminal.
+        """
+        if self.is_bypassing:
+            return False, "C++ backend is not available.", False, [], None
+
+        try:
+            if self.spiel_state.is_terminal():
+                return False, "Game is terminal.", True, [], None
+            is_terminal, returns, new_state = self.spiel_state.play_random_moves_and_view(max_moves)
+            return True, "Random moves applied.", is_terminal, returns, new_state
+        except Exception as e:
+            return False, f"C++ Error: {e}", False, [], None
+
+
     def get_current_state_string(self) -> str:
         """Gets the complete, authoritative game state as a JSON string from C++."""
         if self.is_bypassing:
@@ -160,7 +207,7 @@ class GameInterface:
         return valid_hexes, cities, grid_radius
 
 
-    def play_heuristic_move(self) -> Tuple[bool, str, Optional[str]]:
+    def play_heuristic_move(self) -> Tuple[bool, str, Optional[StateView]]:
         """
         Asks the C++ engine to select and apply one heuristic move for the current player.
         Used by the GUI for non-human players.
@@ -175,16 +222,15 @@ class GameInterface:
                 return False, "Heuristic found no valid action.", None
             
             self.spiel_state.apply_action(action_id)
-            new_state_json = self.spiel_state.serialize()
-            return True, "Heuristic move applied.", new_state_json
+            return True, "Heuristic move applied.", self.spiel_state.state_view()
         except Exception as e:
             print(f"ERROR in play_heuristic_move: {e}")
             return False, f"C++ Error: {e}", None
 
 
-    def get_player_types(self) -> List[str]:
-        """Returns the list of player types."""
-        return [p_type.strip() for p_type in self.player_types.split(',')]
+    def get_player_types(self) -> Tuple[str, ...]:
+        """Returns the player types (parsed once at construction)."""
+        return self._player_types_list
 
 
     def get_num_players(self) -> int:
@@ -381,6 +381,15 @@ class PlayerConfigDialog:
         return self.result
 
 
+def parse_player_types(value: str) -> Tuple[PlayerType, ...]:
+    """argparse type for --player_types: validates the CSV once into a tuple of PlayerType."""
+    try:
+        return tuple(PlayerType(p.strip().lower()) for p in value.split(','))
+    except ValueError:
+        valid = ', '.join(t.value for t in PlayerType)
+        raise argparse.ArgumentTypeError(f"invalid player types '{value}' (choose from: {valid})")
+
+
 def parse_player_config_args(parser: argparse.ArgumentParser):
     """Add player configuration arguments to argument parser"""
     player_group = parser.add_argument_group('Player Configuration')
@@ -393,7 +402,7 @@ def parse_player_config_args(parser: argparse.ArgumentParser):
     
     player_group.add_argument(
         '--player_types',
-        type=str,
+        type=parse_player_types,
         default='human,ai',
         help='Comma-separated list of player types (human, ai, heuristic). E.g., "human,ai,ai"'
     )
@@ -436,13 +445,13 @@ def get_player_config_from_args(args, num_players: int) -> Optional[GamePlayerCo
             print(f"Warning: Failed to load player config from {args.player_config}: {e}")
     
     # Parse from individual arguments
-    player_types = args.player_types.split(',') if hasattr(args, 'player_types') else ['human'] * num_players
+    player_types = list(args.player_types) if hasattr(args, 'player_types') else [PlayerType.HUMAN] * num_players
     ai_models = args.ai_models.split(',') if hasattr(args, 'ai_models') and args.ai_models else []
     thinking_times = [float(x) for x in args.ai_thinking_times.split(',')] if hasattr(args, 'ai_thinking_times') else [1.0]
     ai_strengths = [float(x) for x in args.ai_strengths.split(',')] if hasattr(args, 'ai_strengths') else [1.0]
     
     # Extend lists to match number of players
-    player_types = (player_types + ['human'] * num_players)[:num_players]
+    player_types = (player_types + [PlayerType.HUMAN] * num_players)[:num_players]
     thinking_times = (thinking_times + [1.0] * num_players)[:num_players]
     ai_strengths = (ai_strengths + [1.0] * num_players)[:num_players]
     
@@ -450,7 +459,7 @@ def get_player_config_from_args(args, num_players: int) -> Optional[GamePlayerCo
     ai_model_index = 0
     
     for i in range(num_players):
-        player_type = PlayerType(player_types[i])
+        player_type = player_types[i]
         model_path = None
         
         if player_type == PlayerType.AI and ai_model_index < len(ai_models):
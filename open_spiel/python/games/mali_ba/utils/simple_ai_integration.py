@@ -30,9 +30,9 @@ def create_game_interface_with_ai(config_file_path=None, enable_move_logging=Tru
         GameInterface with AI capabilities added
     """
     
-    # Convert player config to player_types string if provided
+    # Pass the validated PlayerType members straight through if provided
     if player_config:
-        player_types = player_config.to_player_types_string()
+        player_types = tuple(p.player_type for p in player_config.players)
     else:
         player_types = "human,ai"  # Default
     
@@ -96,7 +96,7 @@ def add_ai_support(game_interface, player_config):
                     ai_action = ai_manager.get_ai_action(current_player, game_interface.spiel_state)
                     if ai_action is not None:
                         game_interface.spiel_state.apply_action(ai_action)
-                        state_json = game_interface.spiel_state.serialize()
+                        state_json = game_interface.spiel_state.state_view()
                         message += f" AI Player {current_player + 1} played action {ai_action}."
                 except Exception as e:
                     print(f"Error in AI move: {e}")
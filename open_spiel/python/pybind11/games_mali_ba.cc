@@ -6,20 +6,66 @@
 #include "open_spiel/games/mali_ba/mali_ba_state.h"
 #include "open_spiel/games/mali_ba/hex_grid.h"
 #include "open_spiel/games/mali_ba/mali_ba_common.h"
+#include "open_spiel/games/mali_ba/json.hpp"
 #include "open_spiel/spiel.h"
 #include "open_spiel/spiel_globals.h"
 #include "open_spiel/spiel_utils.h"
 
+#include <pybind11/numpy.h>
 #include <pybind11/stl.h>
 #include <pybind11/stl_bind.h>
 
 namespace py = pybind11;
+// These bindings stay on pybind11: they are registered into the pyspiel module
+// and Mali_BaState/Mali_BaGame derive from the pybind11-bound open_spiel::State
+// and Game classes, which a nanobind module cannot subclass. Per-call overhead is
+// instead kept off the GUI hot path by batching (play_random_moves_and_view
+// returns terminality, returns and the state view in one crossing).
 // No need for 'using open_spiel::mali_ba::...' here at the global scope
 // if the function is inside the open_spiel namespace
 
 // --- WRAP THE ENTIRE FUNCTION DEFINITION IN THE open_spiel NAMESPACE ---
 namespace open_spiel {
 
+namespace {
+
+// Converts a Mali_BaState::ToJson() object directly into Python objects, so the
+// GUI gets the same dict json.loads(serialize()) would produce without the
+// string encode/decode in between.
+py::object JsonToPy(const nlohmann::json& j) {
+    switch (j.type()) {
+        case nlohmann::json::value_t::object: {
+            py::dict d;
+            for (auto it = j.begin(); it != j.end(); ++it) {
+                d[py::str(it.key())] = JsonToPy(it.value());
+            }
+            return std::move(d);
+        }
+        case nlohmann::json::value_t::array: {
+            py::list l(j.size());
+            size_t i = 0;
+            for (const auto& value : j) {
+                l[i++] = JsonToPy(value);
+            }
+            return std::move(l);
+        }
+        case nlohmann::json::value_t::string:
+            return py::str(j.get_ref<const std::string&>());
+        case nlohmann::json::value_t::boolean:
+            return py::bool_(j.get<bool>());
+        case nlohmann::json::value_t::number_integer:
+            return py::int_(j.get<int64_t>());
+        case nlohmann::json::value_t::number_unsigned:
+            return py::int_(j.get<uint64_t>());
+        case nlohmann::json::value_t::number_float:
+            return py::float_(j.get<double>());
+        default:
+            return py::none();
+    }
+}
+
+}  // namespace
+
 // Now you can use the shorter names for Mali-Ba specific types if you wish,
 // or continue using the fully qualified names.
 // For clarity, let's use using declarations *inside* this function if needed,
@@ -94,6 +140,40 @@ void init_pyspiel_games_mali_ba(::pybind11::module &m) {
         py::class_<mali_ba::Mali_BaState, open_spiel::State, std::shared_ptr<mali_ba::Mali_BaState>> state_class_binder(m, "Mali_BaState");
         state_class_binder // Use the named variable to chain .def calls
             .def("play_random_move_and_serialize", &mali_ba::Mali_BaState::PlayRandomMoveAndSerialize)
+            .def("state_view", [](const mali_ba::Mali_BaState& state) {
+                return JsonToPy(state.ToJson());
+            })
+            // Returns (is_terminal, returns, state_view). Returns() is only
+            // computed (and logged) once the game has ended; otherwise it is empty.
+            .def("play_random_moves_and_view", [](mali_ba::Mali_BaState& state, int max_moves) {
+                bool is_terminal = state.PlayRandomMoves(max_moves);
+                std::vector<double> returns;
+                if (is_terminal) returns = state.Returns();
+                return py::make_tuple(is_terminal, returns, JsonToPy(state.ToJson()));
+            }, py::arg("max_moves") = 1)
+            // Fills a preallocated, C-contiguous float32 array with the current
+            // player's observation, skipping the list -> ndarray round trip.
+            .def("observation_tensor_into", [](const mali_ba::Mali_BaState& state,
+                                               py::array_t<float, py::array::c_style> out) {
+                SPIEL_CHECK_EQ(out.size(), state.GetGame()->ObservationTensorSize());
+                state.ObservationTensor(state.CurrentPlayer(),
+                                        absl::MakeSpan(out.mutable_data(), out.size()));
+            }, py::arg("out").noconvert())
+            // Writes Rewards() into a preallocated float32 array. Returns false and
+            // leaves `out` untouched when every reward is zero (most moves).
+            .def("rewards_into", [](const mali_ba::Mali_BaState& state,
+                                    py::array_t<float, py::array::c_style> out) {
+                std::vector<double> rewards = state.Rewards();
+                SPIEL_CHECK_EQ(static_cast<size_t>(out.size()), rewards.size());
+                bool any_nonzero = false;
+                for (double r : rewards) {
+                    if (r != 0.0) { any_nonzero = true; break; }
+                }
+                if (!any_nonzero) return false;
+                float* data = out.mutable_data();
+                for (size_t i = 0; i < rewards.size(); ++i) data[i] = static_cast<float>(rewards[i]);
+                return true;
+            }, py::arg("out").noconvert())
             .def("get_player_common_goods", &mali_ba::Mali_BaState::GetPlayerCommonGoods, py::return_value_policy::reference_internal)
             .def("get_player_rare_goods", &mali_ba::Mali_BaState::GetPlayerRareGoods, py::return_value_policy::reference_internal)
             .def("parse_move_string_to_action", &mali_ba::Mali_BaState::ParseMoveStringToAction)